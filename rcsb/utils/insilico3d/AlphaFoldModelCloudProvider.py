@@ -4,6 +4,11 @@
 # Date:    7-Dec-2023
 #
 # Updates:
+#  17-Oct-2026 dwp Retain a single Google Cloud storage client across reloads of the same provider instance
+#  17-Oct-2026 dwp List archive files with os.scandir, memoized per directory (until its mtime changes), and return the files
+#                  from all of the given directories (not just the last one)
+#  17-Oct-2026 dwp Use the common memoized directory listing in ModelFileUtil
+#  17-Oct-2026 dwp Skip re-downloading archive files whose local copy matches the bucket object generation recorded when it was fetched
 ##
 """
 Accessors for AlphaFold 3D Models (mmCIF) from public Google Cloud datasets.
@@ -26,13 +31,12 @@ import logging
 import os
 import time
 import copy
-import glob
-import tarfile
 from google.cloud import storage
 
 from rcsb.utils.io.FileUtil import FileUtil
 from rcsb.utils.io.MarshalUtil import MarshalUtil
 from rcsb.utils.insilico3d.ModelReorganizer import ModelReorganizer
+from rcsb.utils.insilico3d.ModelFileUtil import ModelFileUtil
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
 logger = logging.getLogger(__name__)
@@ -57,11 +61,14 @@ class AlphaFoldModelCloudProvider:
         self.__baseWorkPath = baseWorkPath if baseWorkPath else self.__cachePath
         self.__workPath = os.path.join(self.__baseWorkPath, "work-dir", "AlphaFoldCloud")  # Directory where model files will be downloaded (also contains AF-specific cache file)
         self.__aFCTaxIdDataCacheFile = os.path.join(self.__workPath, "model-download-cache.json")
+        self.__blobGenerationFileName = ".blob-generations.json"  # per taxId prefix directory, records the bucket object generation of each downloaded archive file
 
         self.__bucketName = "public-datasets-deepmind-alphafold-v4"
+        self.__storageClient = None  # Created on first fetch, and reused for any subsequent reloads
 
         self.__mU = MarshalUtil(workPath=self.__workPath)
         self.__fU = FileUtil(workPath=self.__workPath)
+        self.__mfU = ModelFileUtil()
 
         self.__oD, self.__createdDate = self.__reload(useCache=useCache, redownloadBulkData=redownloadBulkData, **kwargs)
 
@@ -151,16 +158,25 @@ class AlphaFoldModelCloudProvider:
                     archiveDirFileD[archiveDir][archiveDirSubsetIdx] = {"archive_files": archiveFileD}
         return archiveDirFileD
 
+    def __getStorageClient(self):
+        if self.__storageClient is None:
+            self.__storageClient = storage.Client()
+        return self.__storageClient
+
     def fetchTaxIdArchive(self, taxIdPrefix, cacheD):
         try:
             startTime = time.time()
-            client = storage.Client()
+            client = self.__getStorageClient()
             bucket = client.bucket(self.__bucketName)
             #
             taxIdPrefixDataDumpDir = os.path.join(self.__workPath, taxIdPrefix)
             self.__fU.mkdir(taxIdPrefixDataDumpDir)
             blobs = bucket.list_blobs(prefix="proteomes/proteome-tax_id-" + taxIdPrefix)
             #
+            generationFilePath = os.path.join(taxIdPrefixDataDumpDir, self.__blobGenerationFileName)
+            generationD = self.__mU.doImport(generationFilePath, fmt="json") if self.__mU.exists(generationFilePath) else {}
+            generationD = generationD if generationD else {}
+            #
             for blob in blobs:
                 archiveFile = blob.name.split("/")[-1]
                 taxId = archiveFile.split("tax_id-")[-1].split("-")[0]
@@ -172,9 +188,16 @@ class AlphaFoldModelCloudProvider:
                     continue
                 archiveFileDumpPath = os.path.join(taxIdPrefixDataDumpDir, archiveFile)
                 # tD.update({"data_directory": taxIdPrefixDataDumpDir})
-                logger.info("Fetching file %s from Google Cloud bucket %s to local path %s", archiveFile, self.__bucketName, archiveFileDumpPath)
-                blob.download_to_filename(archiveFileDumpPath)
-                logger.info("Completed fetch at %s (%.4f seconds)", time.strftime("%Y %m %d %H:%M:%S", time.localtime()), time.time() - startTime)
+                # The object listing already carries each blob's generation and size, so an unchanged archive costs no extra request
+                if generationD.get(archiveFile) == blob.generation and os.path.exists(archiveFileDumpPath) and os.path.getsize(archiveFileDumpPath) == blob.size:
+                    logger.info("Local copy of %s is up-to-date with Google Cloud bucket (generation %r) - skipping download", archiveFile, blob.generation)
+                else:
+                    logger.info("Fetching file %s from Google Cloud bucket %s to local path %s", archiveFile, self.__bucketName, archiveFileDumpPath)
+                    # Verify download integrity with CRC32C (hardware-accelerated via google-crc32c) instead of the MD5 default
+                    blob.download_to_filename(archiveFileDumpPath, checksum="crc32c")
+                    logger.info("Completed fetch at %s (%.4f seconds)", time.strftime("%Y %m %d %H:%M:%S", time.localtime()), time.time() - startTime)
+                    generationD[archiveFile] = blob.generation
+                    self.__mU.doExport(generationFilePath, generationD, fmt="json", indent=4)
                 if taxIdPrefixDataDumpDir not in cacheD["data"]:
                     cacheD["data"].update({taxIdPrefixDataDumpDir: {"0": {"archive_files": {}}}})
                 cacheD["data"][taxIdPrefixDataDumpDir]["0"]["archive_files"][archiveFile] = os.path.getsize(archiveFileDumpPath)
@@ -212,8 +235,7 @@ class AlphaFoldModelCloudProvider:
 
         for archiveDir in inputPathList:
             try:
-                archiveFiles = glob.glob(os.path.join(archiveDir, "*.tar"))
-                archiveFileList = [os.path.abspath(f) for f in archiveFiles]
+                archiveFileList += self.__mfU.listDirFiles(archiveDir, nameSuffix=".tar")
             except Exception as e:
                 logger.exception("Failing with %s", str(e))
 
@@ -379,23 +401,6 @@ class AlphaFoldModelCloudProvider:
         return ok
 
     def __extractModelCifFiles(self, archiveFile):
-        modelPathL = []
-        try:
-            with tarfile.open(archiveFile, "r") as tF:
-                tfL = tF.getnames()  # Get a list of items (files and directories) in the tar file
-                logger.debug("Tar members in archiveFile %s: %r", archiveFile, tfL)
-                #
-                cifFiles = [file for file in tfL if file.endswith(".cif.gz")]  # only extract model files (not PAE and pLDDT files)
-                # numModels = len(cifFiles)
-                archiveFileDirPath = os.path.dirname(os.path.abspath(archiveFile))
-                for cifFile in cifFiles:
-                    fOutputPath = os.path.join(archiveFileDirPath, cifFile)
-                    fIn = tF.extractfile(cifFile)
-                    with open(fOutputPath, "wb") as ofh:
-                        ofh.write(fIn.read())
-                    modelPathL.append(fOutputPath)
-        #
-        except Exception as e:
-            logger.exception("Failing with %s", str(e))
-        #
-        return modelPathL
+        # Only extract model files (not PAE and pLDDT files)
+        archiveFileDirPath = os.path.dirname(os.path.abspath(archiveFile))
+        return self.__mfU.extractTarMembers(archiveFile, archiveFileDirPath, memberSuffix=".cif.gz")
@@ -9,6 +9,20 @@
 #                  During reorganizing process, also rename the file to use an internal identifier instead of the original source filename;
 #                  Change cache file to record new internal identifier, original filename, and accession URL for each model file;
 #                  Add usage of config file object for specifying location for storing model files
+#  17-Oct-2026 dwp Reorganize all pending species archives in a single worker pool (rather than one species at a time), and fix
+#                  getModelFileList() to return the models from all of the given directories (not just the last one)
+#  17-Oct-2026 dwp Extract only the model mmCIF files from species archives (instead of extracting all files and then deleting the PDB files)
+#  17-Oct-2026 dwp Stream species archives from the FTP server straight into tar extraction (via a named pipe), instead of
+#                  writing out the full archive file and then reading it back in
+#  17-Oct-2026 dwp Fetch multiple species archives concurrently (each over its own FTP connection)
+#  17-Oct-2026 dwp List model files with os.scandir, memoized per directory until it changes (ModelFileUtil.listDirFiles())
+#  17-Oct-2026 dwp Fetch and extract each species archive file only once, even if it is listed under more than one species entry
+#  17-Oct-2026 dwp Cap the number of concurrent species fetches to the open file descriptor limit
+#  17-Oct-2026 dwp Compile the archive exclusion pattern once rather than per archive listing entry
+#  17-Oct-2026 dwp Add loadCache() to pick up species data downloaded by another process without contacting the FTP server
+#  17-Oct-2026 dwp Record species sharing an already fetched archive file in the cache (against its data directory), and only list
+#                  and reorganize each shared data directory once
+#  17-Oct-2026 dwp Log and skip a species whose concurrent fetch fails to connect to the FTP server (rather than aborting the batch)
 #
 # To Do:
 # - Add check that converted files are consistent with mmCIF dictionaries
@@ -27,15 +41,16 @@ import datetime
 import logging
 import os.path
 import time
-from pathlib import Path
 import copy
-import glob
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from rcsb.utils.io.FileUtil import FileUtil
 from rcsb.utils.io.MarshalUtil import MarshalUtil
 from rcsb.utils.io.FtpUtil import FtpUtil
 from rcsb.utils.insilico3d.ModelReorganizer import ModelReorganizer
+from rcsb.utils.insilico3d.ModelFileUtil import ModelFileUtil
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
 logger = logging.getLogger(__name__)
@@ -54,6 +69,7 @@ class AlphaFoldModelProvider:
                                        When True, checks if last downloaded set of files is up-to-date and downloads any newly available models.
                                        When False (default), redownloads all model files.
             reload (bool, optional): Peform full reload (i.e., download/update) upon instantiation. Defaults to True.
+            numFetchThreads (int, optional): maximum number of species archives to fetch concurrently (each over a separate FTP connection). Defaults to 4.
         """
         # Use the same root cachePath for all types of insilico3D model sources, but with unique workPath names (sub-directory)
         self.__cachePath = cachePath  # Directory where model files will be reorganized and stored permanently (also contains computed-model-cache.json file) (i.e., 'computed-models')
@@ -64,10 +80,12 @@ class AlphaFoldModelProvider:
 
         self.__ftpHost = kwargs.get("ftpHost", "ftp.ebi.ac.uk")
         self.__ftpDataPath = kwargs.get("ftpDataPath", "/pub/databases/alphafold/")
+        self.__numFetchThreads = kwargs.get("numFetchThreads", 4)
 
         self.__mU = MarshalUtil(workPath=self.__workPath)
         self.__fU = FileUtil(workPath=self.__workPath)
         self.__ftpU = FtpUtil(workPath=self.__workPath)
+        self.__mfU = ModelFileUtil()
 
         if reload:
             self.__oD, self.__createdDate = self.__reload(useCache=useCache, **kwargs)
@@ -84,6 +102,24 @@ class AlphaFoldModelProvider:
     def reload(self, useCache, **kwargs):
         self.__oD, self.__createdDate = self.__reload(useCache=useCache, **kwargs)
 
+    def loadCache(self):
+        """Load the species archive data from the cache file only, without checking the FTP server for updates
+        (e.g., to pick up data that were downloaded by a separate process).
+
+        Returns:
+            (bool): True if the cache file was loaded; False otherwise.
+        """
+        if not self.__mU.exists(self.__speciesDataCacheFile):
+            logger.error("Data cache file %s not found", self.__speciesDataCacheFile)
+            return False
+        try:
+            cacheD = self.__mU.doImport(self.__speciesDataCacheFile, fmt="json")
+            self.__oD, self.__createdDate = cacheD["data"], cacheD["created"]
+            return True
+        except Exception as e:
+            logger.exception("Failing with %s", str(e))
+        return False
+
     def __reload(self, **kwargs):
         """Reload cached list of species-specific AlphaFold model data files and check FTP server for updated data sets,
         or re-download latest versions of all species-specific model data sets from FTP server.
@@ -103,7 +139,7 @@ class AlphaFoldModelProvider:
             alphaFoldLatestDataList = "pub/databases/alphafold/download_metadata.json"
             alphaFoldRequestedSpeciesList = kwargs.get("alphaFoldRequestedSpeciesList", [])
             excludeArchiveFileRegexList = ["swissprot_pdb_v[0-9]+.tar"]
-            excludeArchiveFileRegexListCombined = "(?:% s)" % "|".join(excludeArchiveFileRegexList)
+            excludeArchiveFileRegex = re.compile("(?:% s)" % "|".join(excludeArchiveFileRegexList))
 
             self.__ftpU.connect(self.__ftpHost)
             self.__fU.mkdir(self.__workPath)
@@ -113,7 +149,7 @@ class AlphaFoldModelProvider:
             lDL = self.__mU.doImport(latestDataListDumpPath, fmt="json")
 
             # Exclude undesired archives (defined in excludeArchiveFileRegexList)
-            lDL = [s for s in lDL if not re.match(excludeArchiveFileRegexListCombined, s["archive_name"])]
+            lDL = [s for s in lDL if not excludeArchiveFileRegex.match(s["archive_name"])]
 
             # If a specific list of species files was requested, only iterate over those
             if alphaFoldRequestedSpeciesList:
@@ -128,6 +164,7 @@ class AlphaFoldModelProvider:
                 createdDate = cacheD["created"]
                 oD = cacheD["data"]
                 cacheArchiveFileList = [sF for sF in oD]
+                fetchArchiveDataList = []
                 logger.info("Checking consistency of cached data with data available on FTP")
                 for archiveD in alphaFoldArchiveDataList:
                     try:
@@ -137,9 +174,7 @@ class AlphaFoldModelProvider:
                         speciesNumModels = int(archiveD["num_predicted_structures"])
                         if speciesName not in cacheArchiveFileList:
                             logger.info("Species archive data for %s not found in local cache. Will re-fetch.", speciesName)
-                            cacheD = self.fetchSpeciesArchive(archiveD, cacheD)
-                            oD = cacheD["data"]
-                            ok = self.__mU.doExport(self.__speciesDataCacheFile, cacheD, fmt="json", indent=4)
+                            fetchArchiveDataList.append(archiveD)
                             continue
                         #
                         # Check if cache was already reorganized
@@ -165,13 +200,15 @@ class AlphaFoldModelProvider:
                             )
                     except Exception as e:
                         logger.exception("Failing on checking of cache data for %s from FTP server, with message:\n%s", archiveD["archive_name"], str(e))
+                if fetchArchiveDataList:
+                    cacheD = self.__fetchSpeciesArchives(fetchArchiveDataList, cacheD)
+                    oD = cacheD["data"]
 
             else:
                 logger.info("Refetching all files from server.")
                 cacheD = {}
                 cacheD.update({"created": startDateTime, "data": {}})
-                for archiveD in alphaFoldArchiveDataList:
-                    cacheD = self.fetchSpeciesArchive(archiveD, cacheD)
+                cacheD = self.__fetchSpeciesArchives(alphaFoldArchiveDataList, cacheD)
                 createdDate = cacheD["created"]
                 oD = cacheD["data"]
                 ok = self.__mU.doExport(self.__speciesDataCacheFile, cacheD, fmt="json", indent=4)
@@ -182,8 +219,73 @@ class AlphaFoldModelProvider:
 
         return oD, createdDate
 
-    def fetchSpeciesArchive(self, archiveD, cacheD):
+    def __fetchSpeciesArchives(self, archiveDataList, cacheD):
+        """Fetch the given species archives, up to numFetchThreads at a time, each over its own FTP connection.
+
+        The data cache file is updated (from this thread only) as each species fetch completes. Archive files that are
+        already in the cache, or that are listed more than once, are only fetched and extracted once; each further species
+        listing the same archive file is recorded in the cache against the same data directory.
+
+        Args:
+            archiveDataList (list): list of species archive metadata dictionaries (from the AlphaFold download metadata file)
+            cacheD (dict): species data cache dictionary, to update with the fetched species archives
+
+        Returns:
+            (dict): updated species data cache dictionary
+        """
+        archiveNameS = {sD.get("archive_name") for sD in cacheD["data"].values()}
+        uniqueArchiveDataList = []
+        sharedArchiveDataList = []
+        for archiveD in archiveDataList:
+            if archiveD["archive_name"] in archiveNameS:
+                logger.info("Skipping fetch of %s for %s (archive file already fetched)", archiveD["archive_name"], archiveD.get("species", archiveD.get("label", None)))
+                sharedArchiveDataList.append(archiveD)
+                continue
+            archiveNameS.add(archiveD["archive_name"])
+            uniqueArchiveDataList.append(archiveD)
+        archiveDataList = uniqueArchiveDataList
+        #
+        # Each fetch holds an FTP control and data connection, both ends of a named pipe, and an extracted output file open at once
+        numThreads = self.__mfU.getFdLimitedWorkerCount(min(self.__numFetchThreads, len(archiveDataList)), fdsPerWorker=6)
+        if numThreads <= 1:
+            for archiveD in archiveDataList:
+                cacheD = self.fetchSpeciesArchive(archiveD, cacheD)
+                self.__mU.doExport(self.__speciesDataCacheFile, cacheD, fmt="json", indent=4)
+        else:
+
+            def fetchWorker(archiveD):
+                ftpU = FtpUtil(workPath=self.__workPath)
+                try:
+                    ftpU.connect(self.__ftpHost)
+                    return self.fetchSpeciesArchive(archiveD, {"data": {}}, ftpU=ftpU)
+                except Exception as e:
+                    logger.exception("Failing on connecting to FTP server %s to fetch file %s, with message:\n%s", self.__ftpHost, archiveD["archive_name"], str(e))
+                    return {"data": {}}
+                finally:
+                    ftpU.close()
+
+            logger.info("Fetching %d species archives with %d concurrent FTP connections", len(archiveDataList), numThreads)
+            with ThreadPoolExecutor(max_workers=numThreads) as executor:
+                for speciesCacheD in executor.map(fetchWorker, archiveDataList):
+                    cacheD["data"].update(speciesCacheD["data"])
+                    self.__mU.doExport(self.__speciesDataCacheFile, cacheD, fmt="json", indent=4)
+        #
+        # Record each species sharing an already fetched archive file against the data directory it was extracted into
+        if sharedArchiveDataList:
+            fetchedArchiveD = {sD.get("archive_name"): sD for sD in cacheD["data"].values()}
+            for archiveD in sharedArchiveDataList:
+                fetchedD = fetchedArchiveD.get(archiveD["archive_name"])
+                if fetchedD is None:  # the fetch of the shared archive file failed
+                    continue
+                sD = copy.deepcopy(archiveD)
+                sD.update({"data_directory": fetchedD["data_directory"], "archive_file_path": fetchedD["archive_file_path"]})
+                cacheD["data"].update({archiveD.get("species", archiveD.get("label", None)): sD})
+            self.__mU.doExport(self.__speciesDataCacheFile, cacheD, fmt="json", indent=4)
+        return cacheD
+
+    def fetchSpeciesArchive(self, archiveD, cacheD, ftpU=None):
         try:
+            ftpU = ftpU if ftpU else self.__ftpU
             sD = copy.deepcopy(archiveD)
             startTime = time.time()
             speciesName = sD.get("species", sD.get("label", None))
@@ -194,26 +296,77 @@ class AlphaFoldModelProvider:
             archiveFileDumpPath = os.path.join(speciesDataDumpDir, archiveFile)
             sD.update({"data_directory": speciesDataDumpDir, "archive_file_path": archiveFileDumpPath})
 
-            logger.info("Fetching file %s from FTP server to local path %s", archiveFilePath, archiveFileDumpPath)
-            ok = self.__ftpU.get(archiveFilePath, archiveFileDumpPath)
-            ok = self.__fU.unbundleTarfile(archiveFileDumpPath, dirPath=speciesDataDumpDir)
+            if hasattr(os, "mkfifo"):
+                logger.info("Fetching and extracting file %s from FTP server into local path %s", archiveFilePath, speciesDataDumpDir)
+                ok, modelPathL = self.__fetchAndExtractArchive(archiveFilePath, archiveFileDumpPath + ".fifo", speciesDataDumpDir, ftpU)
+            else:
+                logger.info("Fetching file %s from FTP server to local path %s", archiveFilePath, archiveFileDumpPath)
+                ok = ftpU.get(archiveFilePath, archiveFileDumpPath)
+                # Only extract the model mmCIF files (skipping the PDB-format copies of each model)
+                modelPathL = self.__mfU.extractTarMembers(archiveFileDumpPath, speciesDataDumpDir, memberSuffix=".cif.gz")
+                self.__fU.remove(archiveFileDumpPath)
+            ok = ok and len(modelPathL) > 0
             logger.info("Completed fetch (%r) at %s (%.4f seconds)", ok, time.strftime("%Y %m %d %H:%M:%S", time.localtime()), time.time() - startTime)
 
-            logger.info("Clearing PDB files from extracted tar bundle...")
-            for pdbDumpFile in Path(speciesDataDumpDir).glob("*.pdb.gz"):
-                pdbDumpFile.unlink()
-
             if ok:
                 cacheD["data"].update({speciesName: sD})
-                self.__fU.remove(archiveFileDumpPath)
 
         except Exception as e:
             logger.exception("Failing on fetching and expansion of file %s from FTP server, with message:\n%s", archiveD["archive_name"], str(e))
 
         return cacheD
 
+    def __fetchAndExtractArchive(self, archiveFilePath, fifoPath, destDir, ftpU):
+        """Fetch a species archive from the FTP server and extract its model mmCIF files as the data arrives, without storing the archive itself.
+
+        The FTP download writes into a named pipe from a background thread, while the tar stream is read from the other end.
+
+        Args:
+            archiveFilePath (str): remote path of the species tar archive
+            fifoPath (str): local path at which to create the (temporary) named pipe
+            destDir (str): directory into which to extract the model files
+            ftpU (obj): connected FtpUtil instance to fetch with
+
+        Returns:
+            (bool, list): FTP download status, and list of extracted model file paths
+        """
+        fetchD = {"ok": False}
+        readerDone = threading.Event()
+
+        def fetchWorker():
+            try:
+                fetchD["ok"] = ftpU.get(archiveFilePath, fifoPath)
+            finally:
+                # Make sure the reading end is released (with EOF) even if the download failed before it opened the pipe.
+                # A non-blocking open for writing fails (ENXIO) until the reader has the pipe open, so keep retrying
+                # until it succeeds or the reader is already done with the pipe.
+                while not readerDone.is_set():
+                    try:
+                        os.close(os.open(fifoPath, os.O_WRONLY | os.O_NONBLOCK))
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+
+        modelPathL = []
+        if os.path.exists(fifoPath):
+            os.remove(fifoPath)
+        os.mkfifo(fifoPath)
+        try:
+            fT = threading.Thread(target=fetchWorker, name="species-archive-fetch", daemon=True)
+            fT.start()
+            try:
+                with open(fifoPath, "rb") as fIn:
+                    modelPathL = self.__mfU.extractTarStream(fIn, destDir, memberSuffix=".cif.gz")
+            finally:
+                readerDone.set()
+            fT.join()
+        finally:
+            os.remove(fifoPath)
+        return fetchD["ok"], modelPathL
+
     def getArchiveDirList(self):
-        archiveDirList = [self.__oD[k]["data_directory"] for k in self.__oD]
+        # Species sharing an archive file share its data directory, so only list each directory once
+        archiveDirList = list(dict.fromkeys(self.__oD[k]["data_directory"] for k in self.__oD))
 
         return archiveDirList
 
@@ -240,8 +393,7 @@ class AlphaFoldModelProvider:
 
         for modelDir in inputPathList:
             try:
-                modelFiles = glob.glob(os.path.join(modelDir, "*.cif.gz"))
-                modelFileList = [os.path.abspath(f) for f in modelFiles]
+                modelFileList += self.__mfU.listDirFiles(modelDir, nameSuffix=".cif.gz")
             except Exception as e:
                 logger.exception("Failing with %s", str(e))
 
@@ -295,6 +447,8 @@ class AlphaFoldModelProvider:
             else:  # Reorganize ALL model files for ALL available species model sets
                 cacheD = self.__mU.doImport(self.__speciesDataCacheFile, fmt="json")
                 archiveDataD = self.getArchiveDataDict()
+                pendingSpeciesD = {}
+                reorganizedDirS = set()  # data directories already reorganized (under any of the species sharing them)
                 for species, archiveD in archiveDataD.items():
                     archiveDir = archiveD["data_directory"]
                     # First check if cache was already reorganized
@@ -304,19 +458,35 @@ class AlphaFoldModelProvider:
                         if reorganized and reorganizedBaseDir is not None:
                             if self.__mU.exists(reorganizedBaseDir) and reorganizedBaseDir == self.__cachePath:
                                 logger.info("Species archive data for %s already reorganized to: %s", species, reorganizedBaseDir)
+                                reorganizedDirS.add(archiveDir)
                                 ok = True
                                 continue
-                    # Proceed with reorganization
-                    inputModelList = self.getModelFileList(inputPathList=[archiveDir])
+                    pendingSpeciesD[species] = archiveDir
+                #
+                # Species sharing an already reorganized data directory only need their cache entry updated
+                for species, archiveDir in list(pendingSpeciesD.items()):
+                    if archiveDir in reorganizedDirS:
+                        cacheD["data"][species].update({"reorganized": True, "reorganizedBaseDir": self.__cachePath})
+                        logger.info("Species archive data for %s already reorganized (shared archive data directory %s)", species, archiveDir)
+                        del pendingSpeciesD[species]
+                        ok = self.__mU.doExport(self.__speciesDataCacheFile, cacheD, fmt="json", indent=4)
+                #
+                # Proceed with reorganization of all pending species together, so that the worker pool is kept busy across species
+                # boundaries (instead of draining at the end of each species) and the holdings file is only written once
+                if pendingSpeciesD:
+                    pendingDirList = list(dict.fromkeys(pendingSpeciesD.values()))  # each shared data directory only once
+                    inputModelList = self.getModelFileList(inputPathList=pendingDirList)
+                    logger.info("Reorganizing %d model files from %d species archives", len(inputModelList), len(pendingDirList))
                     _, ok = mR.reorganize(inputModelList=inputModelList, modelSource="AlphaFold", destBaseDir=self.__cachePath, useCache=useCache)
                     if not ok:
-                        logger.error("Reorganization of model files failed for species archive %s", archiveDir)
-                        break
-                    # Update the cache file to indicate that the given species archive has been reorganized
-                    if cacheD["data"][species]["data_directory"] == archiveDir:
-                        cacheD["data"][species].update({"reorganized": True, "reorganizedBaseDir": self.__cachePath})
-                        logger.info("Reorganization of model files complete for species, %s, from archive %s", species, archiveDir)
-                    ok = self.__mU.doExport(self.__speciesDataCacheFile, cacheD, fmt="json", indent=4)
+                        logger.error("Reorganization of model files failed for species archives %r", pendingDirList)
+                    else:
+                        # Update the cache file to indicate that the given species archives have been reorganized
+                        for species, archiveDir in pendingSpeciesD.items():
+                            if cacheD["data"][species]["data_directory"] == archiveDir:
+                                cacheD["data"][species].update({"reorganized": True, "reorganizedBaseDir": self.__cachePath})
+                                logger.info("Reorganization of model files complete for species, %s, from archive %s", species, archiveDir)
+                        ok = self.__mU.doExport(self.__speciesDataCacheFile, cacheD, fmt="json", indent=4)
         #
         except Exception as e:
             logger.exception("Failing with %s", str(e))
@@ -9,6 +9,18 @@
 #   16-Nov-2022  dwp Add new default functionality to fetch model files individually instead of the full bulk download
 #    9-Jan-2023  dwp Fetch data set model IDs directly (don't try to construct them here), and add more ModelArchive data sets
 #    7-Dec-2023  dwp Update base URL for individual model file downloads, which are now served as .cif.gz when using aiohttp
+#   17-Oct-2026  dwp Reuse HTTP connections (keep-alive) across requests and download batches
+#   17-Oct-2026  dwp Extract only the model files from bulk dataset archives (instead of extracting all files and then deleting the others)
+#   17-Oct-2026  dwp Skip reorganizing dataset directories whose model files are unchanged since they were last reorganized (fingerprint sidecar file)
+#   17-Oct-2026  dwp List model files with os.scandir, memoized per directory until it changes (ModelFileUtil.listDirFiles()), and
+#                    return the models from all of the given directories (not just the last one)
+#   17-Oct-2026  dwp Count extracted bulk dataset model files with a single os.scandir pass (instead of pathlib glob)
+#   17-Oct-2026  dwp Add loadCache() to pick up dataset data downloaded by another process without contacting the server
+#   17-Oct-2026  dwp Only skip reorganizing an unchanged dataset if its reorganized models are all still in the holdings and destination,
+#                    and include the destination and reorganizer options in the fingerprint
+#   17-Oct-2026  dwp Skip (rather than fail on) a dataset directory with no model files left and no fingerprint recorded yet
+#   17-Oct-2026  dwp Add close() to release the connections of the HTTP session created by this instance (an injected session is
+#                    left to its owner), called after reload() and reorganizeModelFiles()
 ##
 """
 Accessors for ModelArchive 3D In Silico Models (mmCIF).
@@ -25,8 +37,6 @@ import logging
 import os.path
 import time
 import json
-from pathlib import Path
-import glob
 import asyncio
 import requests
 import aiohttp
@@ -35,6 +45,7 @@ import aiofiles
 from rcsb.utils.io.FileUtil import FileUtil
 from rcsb.utils.io.MarshalUtil import MarshalUtil
 from rcsb.utils.insilico3d.ModelReorganizer import ModelReorganizer
+from rcsb.utils.insilico3d.ModelFileUtil import ModelFileUtil
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
 logger = logging.getLogger(__name__)
@@ -53,6 +64,9 @@ class ModelArchiveModelProvider:
                                        When True, checks if last downloaded set of files is up-to-date and downloads any newly available models.
                                        When False (default), redownloads all model files.
             reload (bool, optional): Peform full reload (i.e., download/update) upon instantiation. Defaults to True.
+            session (requests.Session, optional): HTTP session to use for all API requests (e.g., to share a connection pool with other providers).
+                                                  Defaults to a new session owned by this instance, whose connections
+                                                  are released by close() (called after reload() and reorganizeModelFiles()).
         """
         # Use the same root cachePath for all types of insilico3D model sources, but with unique dirPath names (sub-directory)
         self.__cachePath = cachePath  # Cache path is where all model files will eventually be reorganized and stored in (i.e. "computed-models")
@@ -60,6 +74,7 @@ class ModelArchiveModelProvider:
         self.__workPath = os.path.join(self.__baseWorkPath, "work-dir", "ModelArchive")  # Directory where model files will be downloaded (also contains MA-specific cache file)
         self.__dataSetCacheFile = os.path.join(self.__workPath, "model-download-cache.json")
         self.__dataSetHoldingsFileName = "modelarchive-holdings.json.gz"
+        self.__reorganizeFingerprintFileName = ".reorganize-fingerprint"
 
         self.__modelArchiveSummaryPageBaseApiUrl = "https://www.modelarchive.org/api/projects/"
         self.__modelArchiveBaseDownloadUrl = "https://www.modelarchive.org/doi/10.5452/"
@@ -68,9 +83,15 @@ class ModelArchiveModelProvider:
 
         self.__mU = MarshalUtil(workPath=self.__workPath)
         self.__fU = FileUtil(workPath=self.__workPath)
+        self.__mfU = ModelFileUtil()
+        self.__session = kwargs.get("session", None)
+        self.__ownSession = self.__session is None
+        if self.__ownSession:
+            self.__session = requests.Session()
 
         if reload:
             self.__oD, self.__createdDate = self.__reload(useCache=useCache, **kwargs)
+            self.close()
 
     def testCache(self, minCount=0):  # Increase minCount once we are consistently downloading more than one data set
         if self.__oD and len(self.__oD) > minCount:
@@ -83,6 +104,33 @@ class ModelArchiveModelProvider:
 
     def reload(self, useCache, **kwargs):
         self.__oD, self.__createdDate = self.__reload(useCache=useCache, **kwargs)
+        self.close()
+
+    def close(self):
+        """Close the HTTP session if it was created by this instance (an injected session is left open for its owner).
+
+        The session stays usable afterwards, since requests opens new pooled connections on demand.
+        """
+        if self.__ownSession:
+            self.__session.close()
+
+    def loadCache(self):
+        """Load the model dataset data from the cache file only, without checking the server for updates
+        (e.g., to pick up data that were downloaded by a separate process).
+
+        Returns:
+            (bool): True if the cache file was loaded; False otherwise.
+        """
+        if not self.__mU.exists(self.__dataSetCacheFile):
+            logger.error("Data cache file %s not found", self.__dataSetCacheFile)
+            return False
+        try:
+            cacheD = self.__mU.doImport(self.__dataSetCacheFile, fmt="json")
+            self.__oD, self.__createdDate = cacheD["data"], cacheD["created"]
+            return True
+        except Exception as e:
+            logger.exception("Failing with %s", str(e))
+        return False
 
     def __reload(self, **kwargs):
         """Reload cached list of ModelArchive model dataset files and check server for updated data sets,
@@ -173,15 +221,11 @@ class ModelArchiveModelProvider:
                             logger.info("Fetching file %s from server to local path %s", dataSetFilePath, dataSetFileDumpPath)
                             ok = self.__fU.get(dataSetFilePath, dataSetFileDumpPath)
                             logger.info("Completed fetch (%r) at %s (%.4f seconds)", ok, time.strftime("%Y %m %d %H:%M:%S", time.localtime()), time.time() - startTime)
-                            ok = self.__fU.unbundleZipfile(dataSetFileDumpPath, dirPath=dataSetDataDumpDir)
+                            # Only extract the model files (skipping the a3m and local pairwise quality data files)
+                            modelPathL = self.__mfU.extractZipMembers(dataSetFileDumpPath, dataSetDataDumpDir, excludeSuffixList=[".a3m", "_local_pairwise_qa.cif"])
+                            ok = len(modelPathL) > 0
                             logger.info("Completed unbundle (%r) at %s (%.4f seconds)", ok, time.strftime("%Y %m %d %H:%M:%S", time.localtime()), time.time() - startTime)
-                            #
-                            logger.info("Clearing non-model files from extracted zip bundle...")
-                            for nonModelFile in Path(dataSetDataDumpDir).glob("*.a3m"):
-                                nonModelFile.unlink()
-                            for nonModelFile in Path(dataSetDataDumpDir).glob("*_local_pairwise_qa.cif"):
-                                nonModelFile.unlink()
-                            numModelsDownloaded = len(list(Path(dataSetDataDumpDir).glob("*.cif*")))
+                            numModelsDownloaded = len(self.__mfU.listDirFiles(dataSetDataDumpDir, nameSuffix=(".cif", ".cif.gz")))
                         else:
                             # Download model files individually
                             sD.update({"downloadMethod": "individual"})
@@ -229,7 +273,7 @@ class ModelArchiveModelProvider:
         Returns:
             list: list of individual model IDs
         """
-        modelSetResp = requests.get(os.path.join(self.__modelArchiveSummaryPageBaseApiUrl, modelSetName), timeout=600)
+        modelSetResp = self.__session.get(os.path.join(self.__modelArchiveSummaryPageBaseApiUrl, modelSetName), timeout=600)
         modelSetRespMaterials = modelSetResp.json()["materials_procedures"]["materials"]
         startIdx = modelSetRespMaterials.index("linkData=") + len("linkData=")
         endIdx = modelSetRespMaterials.index("];", startIdx) + 1
@@ -292,34 +336,34 @@ class ModelArchiveModelProvider:
         #
         resultList, failList = [], []
         maxRetries = 10
-        for batchNum, batchUrls in enumerate(modelUrlBatches(modelUrlList, limit)):
-            logger.info("Downloading batch %d", batchNum + 1)
-            async with aiohttp.ClientSession() as session:
+        # Use a single client session (and so a single keep-alive connection pool) for all batches and retries
+        async with aiohttp.ClientSession() as session:
+            for batchNum, batchUrls in enumerate(modelUrlBatches(modelUrlList, limit)):
+                logger.info("Downloading batch %d", batchNum + 1)
                 tasks = []
                 for modelUrl in batchUrls:
                     tasks.append(fetchFile(modelUrl, session))
                 resL = await asyncio.gather(*tasks)
                 failL = [i for i in resL if i is not True]
                 resultList += resL
-                time.sleep(breakTime)
-            # Re-run any failed model file downloads
-            if len(failL) > 0:
-                retries = 0
-                while len(failL) > 0 and retries < maxRetries:
-                    retries += 1
-                    logger.info("Re-attempting fetch (retry %d) for %d model files: %r", retries, len(failL), failL)
-                    time.sleep(60)  # Give server a minute before refeteching
-                    async with aiohttp.ClientSession() as session:
+                await asyncio.sleep(breakTime)
+                # Re-run any failed model file downloads
+                if len(failL) > 0:
+                    retries = 0
+                    while len(failL) > 0 and retries < maxRetries:
+                        retries += 1
+                        logger.info("Re-attempting fetch (retry %d) for %d model files: %r", retries, len(failL), failL)
+                        await asyncio.sleep(60)  # Give server a minute before refeteching
                         tasks = []
                         for modelUrl in failL:
                             tasks.append(fetchFile(modelUrl, session))
                         resL = await asyncio.gather(*tasks)
                         failL = [i for i in resL if i is not True]
-                    if len(failL) > 0:
-                        logger.info("Re-fetch attempt %d failed for %d model files: %r", retries, len(failL), failL)
-                    else:
-                        logger.info("Re-fetch succeeded for all model files")
-                failList += [i for i in failL]
+                        if len(failL) > 0:
+                            logger.info("Re-fetch attempt %d failed for %d model files: %r", retries, len(failL), failL)
+                        else:
+                            logger.info("Re-fetch succeeded for all model files")
+                    failList += [i for i in failL]
         #
         ok = len(failList) == 0 and len(resultList) > 0
         numModelsDownloaded = len([i for i in resultList if i is True])
@@ -348,8 +392,7 @@ class ModelArchiveModelProvider:
 
         for modelDir in inputPathList:
             try:
-                modelFiles = glob.glob(os.path.join(modelDir, "*.cif.gz"))  # may need to be ".cif" for bulk downloads, but need to check
-                modelFileList = [os.path.abspath(f) for f in modelFiles]
+                modelFileList += self.__mfU.listDirFiles(modelDir, nameSuffix=".cif.gz")  # may need to be ".cif" for bulk downloads, but need to check
             except Exception as e:
                 logger.exception("Failing with %s", str(e))
 
@@ -364,6 +407,55 @@ class ModelArchiveModelProvider:
     def getArchiveDataCacheFilePath(self):
         return self.__dataSetCacheFile
 
+    def __getModelDirFingerprint(self, archiveDir, mR, **kwargs):
+        """Fingerprint the model files in a dataset directory together with where and how they are reorganized, so that
+        a change to either the source files, the destination, or the output-affecting reorganizer options forces a rerun.
+        """
+        salt = json.dumps(
+            {
+                "destBaseDir": os.path.abspath(self.__cachePath),
+                "holdingsFilePath": os.path.abspath(mR.getCacheFilePath()),
+                "modelCompression": kwargs.get("modelCompression", "gzip"),
+                "zstdLevel": kwargs.get("zstdLevel", 10),
+                "zstdDictPath": kwargs.get("zstdDictPath", None),
+                "dictFilePathL": kwargs.get("dictFilePathL", None),
+            },
+            sort_keys=True,
+        )
+        return self.__mfU.getDirFingerprint(archiveDir, nameSuffix=(".cif", ".cif.gz"), salt=salt)
+
+    def __isReorganizedUnchanged(self, fingerprintD, fingerprint, holdingsD):
+        """Return True if the dataset model files are unchanged since they were last reorganized (fingerprintD, as read from
+        the fingerprint file) and all of the models reorganized then are still in the holdings, with their output files present.
+        """
+        if not fingerprintD or fingerprintD.get("fingerprint") != fingerprint or not fingerprintD.get("modelIdList"):
+            return False
+        for modelId in fingerprintD["modelIdList"]:
+            modelD = holdingsD.get(modelId)
+            if not modelD or not os.path.exists(os.path.join(self.__cachePath, modelD["modelPath"])):
+                logger.info("Reorganized model %s missing from holdings or destination %s", modelId, self.__cachePath)
+                return False
+        return True
+
+    def __readFingerprint(self, fingerprintFilePath):
+        try:
+            with open(fingerprintFilePath, "r", encoding="utf-8") as ifh:
+                return json.load(ifh)
+        except (OSError, ValueError):
+            return None
+
+    def __writeFingerprint(self, fingerprintFilePath, fingerprint, modelIdList):
+        """Write the fingerprint file atomically (to a temporary file in the same directory, then renamed into place)."""
+        try:
+            tmpFilePath = fingerprintFilePath + ".tmp"
+            with open(tmpFilePath, "w", encoding="utf-8") as ofh:
+                json.dump({"fingerprint": fingerprint, "modelIdList": modelIdList}, ofh)
+            os.replace(tmpFilePath, fingerprintFilePath)
+            return True
+        except Exception as e:
+            logger.exception("Failing to write %s with %s", fingerprintFilePath, str(e))
+        return False
+
     def getModelReorganizer(self, cachePath=None, useCache=True, workPath=None, **kwargs):
         cachePath = cachePath if cachePath else self.__cachePath
         workPath = workPath if workPath else self.__workPath
@@ -411,10 +503,31 @@ class ModelArchiveModelProvider:
                 archiveDirList = self.getArchiveDirList()
                 for archiveDir in archiveDirList:
                     #
+                    # Skip the dataset if its model files are unchanged since they were last reorganized into this cachePath
+                    # (with the same options), as long as the resulting models are all still in place
+                    fingerprintFilePath = os.path.join(archiveDir, self.__reorganizeFingerprintFileName)
+                    fingerprint = self.__getModelDirFingerprint(archiveDir, mR, **kwargs)
+                    if useCache and self.__isReorganizedUnchanged(self.__readFingerprint(fingerprintFilePath), fingerprint, mR.getModelHoldings()):
+                        logger.info("Model files in dataset archive %s unchanged since last reorganized - skipping", archiveDir)
+                        ok = True
+                        continue
+                    #
+                    inputModelList = self.getModelFileList(inputPathList=[archiveDir])
+                    if not inputModelList:
+                        if not os.path.exists(fingerprintFilePath):
+                            # E.g., the source files were removed by a reorganization (keepSource=False) from before fingerprints were recorded
+                            logger.info("No model files to reorganize in dataset archive %s - skipping", archiveDir)
+                            ok = True
+                            continue
+                        # The source files were removed by an earlier reorganization (keepSource=False) whose output models have since gone missing
+                        logger.error("No model files to reorganize in dataset archive %s (re-download the dataset)", archiveDir)
+                        ok = False
+                        break
+                    #
                     # Get release date of the dataset archive (TEMPORARY workaround until revision history is included in ModelArchive mmCIF files)
                     archiveName = os.path.basename(os.path.abspath(archiveDir))
                     archiveSummaryPageApiUrl = os.path.join(self.__modelArchiveSummaryPageBaseApiUrl, archiveName)
-                    response = requests.get(archiveSummaryPageApiUrl, timeout=600)
+                    response = self.__session.get(archiveSummaryPageApiUrl, timeout=600)
                     try:
                         sourceArchiveReleaseDate = response.json()["release_date"]  # e.g., '2022-09-28'
                         logger.info("Dataset archive %s: release date %s", archiveName, sourceArchiveReleaseDate)
@@ -427,8 +540,8 @@ class ModelArchiveModelProvider:
                         )
                         raise ValueError("Failed to get release date for archive dataset.")
                     #
-                    inputModelList = self.getModelFileList(inputPathList=[archiveDir])
-                    _, ok = mR.reorganize(
+                    inputModelFileNameS = {os.path.basename(modelPath) for modelPath in inputModelList}
+                    mD, ok = mR.reorganize(
                         inputModelList=inputModelList,
                         modelSource="ModelArchive",
                         destBaseDir=self.__cachePath,
@@ -438,8 +551,12 @@ class ModelArchiveModelProvider:
                     if not ok:
                         logger.error("Reorganization of model files failed for dataset archive %s", archiveDir)
                         break
+                    modelIdList = sorted(modelId for modelId, modelD in mD.items() if modelD.get("sourceModelFileName") in inputModelFileNameS)
+                    self.__writeFingerprint(fingerprintFilePath, self.__getModelDirFingerprint(archiveDir, mR, **kwargs), modelIdList)
             return ok
         #
         except Exception as e:
             logger.exception("Failing with %s", str(e))
             return False
+        finally:
+            self.close()
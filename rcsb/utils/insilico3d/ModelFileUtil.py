@@ -0,0 +1,349 @@
+##
+# File:    ModelFileUtil.py
+# Author:  Dennis Piehl
+# Date:    17-Oct-2026
+#
+# Updates:
+#   17-Oct-2026  dwp Advise the kernel of sequential access to tar archives during extraction, and drop their cached pages afterwards
+#   17-Oct-2026  dwp Add extractZipMembers(), and write extracted members directly into the output directory (by base name)
+#   17-Oct-2026  dwp Add extractTarStream() for extracting members from a sequential (non-seekable) tar stream
+#   17-Oct-2026  dwp Add getDirFingerprint() for cheaply detecting changes to the files in a directory
+#   17-Oct-2026  dwp Add listDirFiles() for listing the files in a directory, memoized until the directory changes
+#   17-Oct-2026  dwp Add prefetchFiles() for requesting kernel readahead of a batch of files before they are read
+#   17-Oct-2026  dwp Skip hidden and macOS metadata archive members, and write each extracted member atomically (via a ".part" file)
+#   17-Oct-2026  dwp Add getFdLimitedWorkerCount() for capping concurrent workers to the open file descriptor limit
+#
+##
+"""
+Low-level file and archive handling utilities for moving model file data around on local disk.
+
+"""
+
+__docformat__ = "google en"
+__author__ = "Dennis Piehl"
+__email__ = "dennis.piehl@rcsb.org"
+__license__ = "Apache 2.0"
+
+import hashlib
+import logging
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class ModelFileUtil(object):
+    """Utilities for copying and extracting model files, preferring in-kernel copies over userspace read/write loops."""
+
+    def __init__(self, **kwargs):
+        """Initialize ModelFileUtil object.
+
+        Args:
+            bufferSize (int, optional): buffer size (bytes) to use for any userspace copy fallbacks; default 1 MiB.
+        """
+        self.__bufferSize = kwargs.get("bufferSize", 1048576)
+        self.__dirListD = {}  # {(dirPath, nameSuffix): (mtime_ns, [file paths])}
+
+    def copyFileRange(self, fdIn, fdOut, count, offsetIn=0):
+        """Copy a byte range of one file descriptor to the current position of another.
+
+        Tries os.copy_file_range() first (Linux; may be a reflink/metadata-only operation on btrfs/xfs),
+        then os.sendfile(), and finally a buffered userspace copy. Either syscall may return short, so each is looped.
+
+        Args:
+            fdIn (int): input file descriptor (not advanced, as all reads are done at an explicit offset)
+            fdOut (int): output file descriptor (written at, and advanced from, its current position)
+            count (int): number of bytes to copy
+            offsetIn (int, optional): offset in input file at which to start copying. Defaults to 0.
+
+        Returns:
+            int: number of bytes copied
+        """
+        remaining = count
+        offset = offsetIn
+        if remaining > 0 and hasattr(os, "copy_file_range"):
+            try:
+                while remaining > 0:
+                    nB = os.copy_file_range(fdIn, fdOut, remaining, offset)
+                    if nB == 0:
+                        break
+                    offset += nB
+                    remaining -= nB
+            except OSError as e:
+                logger.debug("copy_file_range unavailable for this copy (%s); falling back", str(e))
+        if remaining > 0 and hasattr(os, "sendfile"):
+            try:
+                while remaining > 0:
+                    nB = os.sendfile(fdOut, fdIn, offset, remaining)
+                    if nB == 0:
+                        break
+                    offset += nB
+                    remaining -= nB
+            except OSError as e:
+                logger.debug("sendfile unavailable for this copy (%s); falling back", str(e))
+        while remaining > 0:
+            buf = os.pread(fdIn, min(self.__bufferSize, remaining), offset)
+            if not buf:
+                break
+            view = memoryview(buf)
+            while view:
+                nB = os.write(fdOut, view)
+                view = view[nB:]
+            offset += len(buf)
+            remaining -= len(buf)
+        return count - remaining
+
+    def adviseFile(self, fd, advice):
+        """Pass an access pattern hint for the whole of an open file to the kernel, where supported (i.e., os.posix_fadvise()).
+
+        Args:
+            fd (int): file descriptor
+            advice (str): name of the advice constant, without the "POSIX_FADV_" prefix (e.g., "SEQUENTIAL", "DONTNEED")
+
+        Returns:
+            bool: True if the advice was issued, or False otherwise
+        """
+        adviceConst = getattr(os, "POSIX_FADV_" + advice, None)
+        if not hasattr(os, "posix_fadvise") or adviceConst is None:
+            return False
+        try:
+            os.posix_fadvise(fd, 0, 0, adviceConst)
+            return True
+        except OSError as e:
+            logger.debug("posix_fadvise(%s) failed with %s", advice, str(e))
+        return False
+
+    def getFdLimitedWorkerCount(self, numWorkers, fdsPerWorker, fdsReserved=64):
+        """Cap a number of concurrent (in-process) workers so that their open files and sockets stay within the
+        soft open file descriptor limit (RLIMIT_NOFILE), which can be as low as 256 (e.g., on macOS).
+
+        Args:
+            numWorkers (int): requested number of workers
+            fdsPerWorker (int): number of file descriptors each worker may hold open at once
+            fdsReserved (int, optional): number of file descriptors to leave for everything else. Defaults to 64.
+
+        Returns:
+            int: number of workers to use (at least 1)
+        """
+        if resource is None:
+            return numWorkers
+        try:
+            softLimit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        except (ValueError, OSError):
+            return numWorkers
+        if softLimit == resource.RLIM_INFINITY:
+            return numWorkers
+        maxWorkers = max(1, (softLimit - fdsReserved) // max(fdsPerWorker, 1))
+        if numWorkers > maxWorkers:
+            logger.warning("Reducing number of concurrent workers from %d to %d to stay within the open file limit (%d)", numWorkers, maxWorkers, softLimit)
+            return maxWorkers
+        return numWorkers
+
+    def prefetchFiles(self, filePathList):
+        """Ask the kernel to start reading the given files into the page cache (i.e., POSIX_FADV_WILLNEED), without waiting for the reads.
+
+        Lets the disk reads for a batch of small files proceed in the background while the caller works through them one at a time.
+
+        Args:
+            filePathList (list): list of file paths
+
+        Returns:
+            int: number of files for which readahead was requested
+        """
+        if not hasattr(os, "posix_fadvise"):
+            return 0
+        numAdvised = 0
+        for filePath in filePathList:
+            try:
+                fd = os.open(filePath, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                numAdvised += 1 if self.adviseFile(fd, "WILLNEED") else 0
+            finally:
+                os.close(fd)
+        return numAdvised
+
+    def listDirFiles(self, dirPath, nameSuffix=None):
+        """Return the paths of the (non-hidden) regular files in a directory (non-recursively), using os.scandir.
+
+        Listings are memoized per directory, and are redone whenever the directory's modification time changes (i.e., when
+        files are added, removed, or renamed in it). Listings of directories modified within the last second are not memoized,
+        as a further change within the same filesystem timestamp tick would otherwise go unnoticed.
+
+        Args:
+            dirPath (str): directory path
+            nameSuffix (str or tuple, optional): only include files with names ending in this suffix (or any of these suffixes). Defaults to None (all files).
+
+        Returns:
+            list: list of absolute file paths
+        """
+        dirPath = os.path.abspath(dirPath)
+        cacheKey = (dirPath, nameSuffix)
+        mtimeNs = os.stat(dirPath).st_mtime_ns
+        cachedMtimeNs, filePathL = self.__dirListD.get(cacheKey, (None, []))
+        if cachedMtimeNs != mtimeNs:
+            with os.scandir(dirPath) as sdIt:
+                filePathL = [dE.path for dE in sdIt if not dE.name.startswith(".") and (not nameSuffix or dE.name.endswith(nameSuffix)) and dE.is_file()]
+            if time.time_ns() - mtimeNs > 1000000000:
+                self.__dirListD[cacheKey] = (mtimeNs, filePathL)
+            else:
+                self.__dirListD.pop(cacheKey, None)
+        return list(filePathL)
+
+    def getDirFingerprint(self, dirPath, nameSuffix=None, salt=None):
+        """Compute a fingerprint of the (non-hidden) files in a directory from their names, sizes, and modification times.
+
+        No file content is read, so this costs a single directory scan (os.scandir) and one stat per file.
+
+        Args:
+            dirPath (str): directory path
+            nameSuffix (str or tuple, optional): only include files with names ending in this suffix (or any of these suffixes). Defaults to None (all files).
+            salt (str, optional): additional string to include in the fingerprint (e.g., to distinguish different destination paths). Defaults to None.
+
+        Returns:
+            str: hex digest fingerprint
+        """
+        hObj = hashlib.blake2b(digest_size=16)
+        if salt:
+            hObj.update(salt.encode("utf-8"))
+        with os.scandir(dirPath) as sdIt:
+            entryL = [(dE.name, dE.stat()) for dE in sdIt if not dE.name.startswith(".") and (not nameSuffix or dE.name.endswith(nameSuffix)) and dE.is_file()]
+        for name, st in sorted(entryL, key=lambda t: t[0]):
+            hObj.update(("|%s:%d:%d" % (name, st.st_size, st.st_mtime_ns)).encode("utf-8"))
+        return hObj.hexdigest()
+
+    def extractTarMembers(self, tarFilePath, outputDirPath, memberSuffix=None):
+        """Extract the regular file members of a tar file directly into the given directory (by base name, i.e., without any member sub-directories).
+
+        For uncompressed tar files, member data is copied directly out of the archive file with copyFileRange(),
+        without passing through a Python buffer; compressed tar files fall back to a buffered stream copy.
+        The archive is read once front to back, so it is opened with sequential readahead advice, and its pages
+        are dropped from the page cache once extraction completes (as it is not read again).
+
+        Args:
+            tarFilePath (str): path to tar file
+            outputDirPath (str): directory into which to extract the members
+            memberSuffix (str, optional): only extract members with names ending in this suffix (e.g., ".cif.gz"). Defaults to None (all members).
+
+        Returns:
+            list: paths of extracted files
+        """
+        pathL = []
+        try:
+            with open(tarFilePath, "rb") as fIn:
+                self.adviseFile(fIn.fileno(), "SEQUENTIAL")
+                try:
+                    tF = tarfile.open(fileobj=fIn, mode="r:")
+                    uncompressed = True
+                except tarfile.ReadError:
+                    fIn.seek(0)
+                    tF = tarfile.open(fileobj=fIn, mode="r")
+                    uncompressed = False
+                with tF:
+                    for tI in tF:
+                        if not tI.isreg() or self.__isMetadataMember(tI.name) or (memberSuffix and not tI.name.endswith(memberSuffix)):
+                            continue
+                        outputPath = os.path.join(outputDirPath, os.path.basename(tI.name))
+                        if uncompressed and not tI.issparse():
+                            self.__writeMember(outputPath, lambda ofh, tI=tI: self.__copyTarMemberRange(fIn, ofh, tI))
+                        else:
+                            self.__writeMember(outputPath, lambda ofh, tI=tI: shutil.copyfileobj(tF.extractfile(tI), ofh, self.__bufferSize))
+                        pathL.append(outputPath)
+                self.adviseFile(fIn.fileno(), "DONTNEED")
+        except Exception as e:
+            logger.exception("Failing extracting from %s with %s", tarFilePath, str(e))
+        return pathL
+
+    def extractTarStream(self, fileObj, outputDirPath, memberSuffix=None):
+        """Extract the regular file members of a tar stream directly into the given directory (by base name), reading it strictly sequentially.
+
+        Suited to non-seekable inputs (e.g., a pipe being filled by a download in progress). Any trailing data after the end
+        of the archive is drained, so that the writing end of the stream is never left blocked.
+
+        Args:
+            fileObj (file): readable binary file object positioned at the start of a tar (or compressed tar) stream
+            outputDirPath (str): directory into which to extract the members
+            memberSuffix (str, optional): only extract members with names ending in this suffix (e.g., ".cif.gz"). Defaults to None (all members).
+
+        Returns:
+            list: paths of extracted files
+        """
+        pathL = []
+        try:
+            with tarfile.open(fileobj=fileObj, mode="r|*") as tF:
+                for tI in tF:
+                    if not tI.isreg() or self.__isMetadataMember(tI.name) or (memberSuffix and not tI.name.endswith(memberSuffix)):
+                        continue
+                    outputPath = os.path.join(outputDirPath, os.path.basename(tI.name))
+                    self.__writeMember(outputPath, lambda ofh, tI=tI: shutil.copyfileobj(tF.extractfile(tI), ofh, self.__bufferSize))
+                    pathL.append(outputPath)
+        except Exception as e:
+            logger.exception("Failing extracting from tar stream with %s", str(e))
+        try:
+            while fileObj.read(self.__bufferSize):
+                pass
+        except Exception as e:
+            logger.debug("Failing draining tar stream with %s", str(e))
+        return pathL
+
+    def extractZipMembers(self, zipFilePath, outputDirPath, excludeSuffixList=None):
+        """Extract the file members of a zip file directly into the given directory (by base name, i.e., without any member sub-directories).
+
+        Args:
+            zipFilePath (str): path to zip file
+            outputDirPath (str): directory into which to extract the members
+            excludeSuffixList (list, optional): skip members with names ending in any of these suffixes (e.g., [".a3m"]). Defaults to None (extract all members).
+
+        Returns:
+            list: paths of extracted files
+        """
+        pathL = []
+        excludeSuffixT = tuple(excludeSuffixList) if excludeSuffixList else ()
+        try:
+            with zipfile.ZipFile(zipFilePath) as zF:
+                for zI in zF.infolist():
+                    if zI.is_dir() or self.__isMetadataMember(zI.filename) or (excludeSuffixT and zI.filename.endswith(excludeSuffixT)):
+                        continue
+                    outputPath = os.path.join(outputDirPath, os.path.basename(zI.filename))
+                    with zF.open(zI) as ifh:
+                        self.__writeMember(outputPath, lambda ofh, ifh=ifh: shutil.copyfileobj(ifh, ofh, self.__bufferSize))
+                    pathL.append(outputPath)
+        except Exception as e:
+            logger.exception("Failing extracting from %s with %s", zipFilePath, str(e))
+        return pathL
+
+    def __isMetadataMember(self, memberName):
+        """Return True for archive members that are never model data: hidden files, including macOS AppleDouble ("._*") files, and anything under "__MACOSX/"."""
+        return os.path.basename(memberName).startswith(".") or memberName.startswith("__MACOSX/") or "/__MACOSX/" in memberName
+
+    def __writeMember(self, outputPath, writeFunc):
+        """Write an extracted member via a temporary ".part" file that is renamed into place once complete,
+        so that an interrupted extraction never leaves a truncated file under the final name.
+
+        Args:
+            outputPath (str): final path of the extracted file
+            writeFunc (function): function taking the open (binary) output file object, which writes the member data
+        """
+        partPath = outputPath + ".part"
+        try:
+            with open(partPath, "wb") as ofh:
+                writeFunc(ofh)
+            os.replace(partPath, outputPath)
+        except Exception:
+            if os.path.exists(partPath):
+                os.remove(partPath)
+            raise
+
+    def __copyTarMemberRange(self, fIn, ofh, tarInfo):
+        nB = self.copyFileRange(fIn.fileno(), ofh.fileno(), tarInfo.size, tarInfo.offset_data)
+        if nB != tarInfo.size:
+            raise IOError("Short copy (%d of %d bytes) extracting member %s" % (nB, tarInfo.size, tarInfo.name))
@@ -11,6 +11,7 @@
 # 05-Mar-2024 dwp Adjustments to provide support for CSM scaling (using multiple holdings file, not just one);
 #                 but, still maintain current production support (which relies specifically on computed-models-holdings.json.gz
 #                 and includes fragmented models)
+# 17-Oct-2026 dwp Parse the in-memory holdings file with orjson (and ISA-L gzip) when available
 ##
 
 """
@@ -28,6 +29,16 @@ import os.path
 import os
 import time
 
+try:
+    from isal import igzip as gzip  # ISA-L accelerated drop-in replacement for the gzip module
+except ImportError:
+    import gzip
+
+try:
+    import orjson  # C-extension JSON parser; much faster than the standard json module for the large holdings files
+except ImportError:
+    orjson = None
+
 from rcsb.utils.io.FileUtil import FileUtil
 from rcsb.utils.io.MarshalUtil import MarshalUtil
 from rcsb.utils.io.StashableBase import StashableBase
@@ -139,7 +150,7 @@ class ModelHoldingsProvider(StashableBase):
         try:
             if not self.__mU.exists(localHoldingsFilePath):
                 ok = self.__fetchHoldingsFile(holdingsFile)
-            mD = self.__mU.doImport(localHoldingsFilePath, fmt="json")
+            mD = self.__importJsonFile(localHoldingsFilePath)
             if mD:
                 ok = True
                 logger.info("Imported computed-model holdings file into memory (as self.__mD) %r length %r", localHoldingsFilePath, len(mD))
@@ -153,6 +164,21 @@ class ModelHoldingsProvider(StashableBase):
 
         return mD, fD
 
+    def __importJsonFile(self, filePath):
+        """Import a (optionally gzipped) JSON file, with orjson if it is installed (falling back to MarshalUtil otherwise).
+
+        Args:
+            filePath (str): path to JSON file (ending in ".gz" if gzipped)
+
+        Returns:
+            (dict): imported JSON data
+        """
+        if orjson is None:
+            return self.__mU.doImport(filePath, fmt="json")
+        openFunc = gzip.open if filePath.endswith(".gz") else open
+        with openFunc(filePath, "rb") as ifh:
+            return orjson.loads(ifh.read())
+
     def getFragmentedModelIds(self, modelD=None):
         self.__fD = self.__getFragmentedModelIds(modelD=modelD)
         return True
@@ -4,6 +4,13 @@
 # Date:    6-Apr-2022
 #
 # Updates:
+#   17-Oct-2026  dwp Share a single pooled, retrying HTTP session across provider API requests
+#   17-Oct-2026  dwp Add run() method to pipeline downloading and reorganizing of model files across providers
+#   17-Oct-2026  dwp Run the pipelined downloads in a separate process (so that reorganizer workers are never forked from a
+#                    multithreaded process), and terminate it if the workflow fails
+#   17-Oct-2026  dwp Only run the downloads in a separate process where fork is the default start method (otherwise download and
+#                    reorganize each provider in turn, in-process)
+#   17-Oct-2026  dwp Add close() to close the shared HTTP session, called when run() completes
 #
 # To Do:
 ##
@@ -19,6 +26,12 @@ __email__ = "dennis.piehl@rcsb.org"
 __license__ = "Apache 2.0"
 
 import logging
+import queue
+
+import multiprocess
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from rcsb.utils.insilico3d.AlphaFoldModelProvider import AlphaFoldModelProvider
 from rcsb.utils.insilico3d.AlphaFoldModelCloudProvider import AlphaFoldModelCloudProvider
@@ -53,6 +66,12 @@ class ModelProviderWorkflow:
         self.__alphaFoldRequestedSpeciesList = kwargs.get("alphaFoldRequestedSpeciesList", [])
         self.__alphaFoldRequestedTaxIdPrefixList = kwargs.get("alphaFoldRequestedTaxIdPrefixList", [])
         self.__modelArchiveRequestedDatasetD = kwargs.get("modelArchiveRequestedDatasetD", {})
+        #
+        # Single HTTP session (keep-alive connection pool with retry/backoff) shared by all provider API requests
+        self.__session = requests.Session()
+        httpAdapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(4, self.__numProc), max_retries=Retry(total=5, backoff_factor=1))
+        self.__session.mount("https://", httpAdapter)
+        self.__session.mount("http://", httpAdapter)
 
         if "AlphaFold" in self.__modelProviders:
             self.__aFMP = AlphaFoldModelProvider(
@@ -78,7 +97,8 @@ class ModelProviderWorkflow:
                 baseWorkPath=self.__srcDir,
                 useCache=self.__useCache,
                 reload=False,
-                modelArchiveRequestedDatasetD=self.__modelArchiveRequestedDatasetD
+                modelArchiveRequestedDatasetD=self.__modelArchiveRequestedDatasetD,
+                session=self.__session,
             )
 
     def download(self, modelProviders=None, **kwargs):
@@ -152,9 +172,99 @@ class ModelProviderWorkflow:
             logger.exception("Failing with %s", str(e))
         return ok
 
-    # def run(self, **kwargs):
-    #     """Run the model provider workflow:
-    #         1. Retrieve model files from all sources
-    #         2. Reorganize and rename model files into computed-models data directory
-    #     """
-    #     return
+    def run(self, modelProviders=None, keepSource=False, **kwargs):
+        """Run the model provider workflow:
+            1. Retrieve model files from all sources
+            2. Reorganize and rename model files into computed-models data directory
+
+        Where fork is the default start method (e.g., Linux), the two steps are pipelined across providers: downloads proceed in a
+        separate (forked) process, and the model files of each provider are reorganized as soon as its download completes (while the
+        next provider's files are still being downloaded). Keeping the download threads and connections out of this process means the
+        reorganizer workers are forked from a single-threaded process, and lets an in-flight download be cancelled (terminated) as soon
+        as any step fails. Elsewhere (e.g., macOS, where forking a process that has used threads or network sessions is unsafe), the
+        model files of each provider are downloaded and then reorganized in turn, in this process.
+
+        Args:
+            modelProviders (list, optional): List of model providers to download and reorganize. Defaults to ["AlphaFold", "ModelArchive"].
+            keepSource (bool, optional): whether to copy files to new directory (instead of moving them). Defaults to False.
+            **kwargs (optional): additional arguments passed on to download() and reorganize().
+
+        Returns:
+            (bool): True if successful; False otherwise.
+        """
+        modelProviders = modelProviders if modelProviders else self.__modelProviders
+        try:
+            # The first of all start methods is the platform default (checked without fixing the global start method)
+            startMethod = multiprocess.get_start_method(allow_none=True) or multiprocess.get_all_start_methods()[0]
+            if startMethod != "fork":
+                return self.__runInProcess(modelProviders, keepSource, **kwargs)
+            return self.__runPipelined(modelProviders, keepSource, **kwargs)
+        finally:
+            self.close()
+
+    def close(self):
+        """Close the HTTP session shared by the provider API requests (it stays usable, opening new connections on demand)."""
+        self.__session.close()
+
+    def __runInProcess(self, modelProviders, keepSource, **kwargs):
+        ok = False
+        for provider in modelProviders:
+            ok = self.download(modelProviders=[provider], **kwargs) and self.reorganize(modelProviders=[provider], keepSource=keepSource, **kwargs)
+            if not ok:
+                logger.error("Model provider workflow failed for provider, %s", provider)
+                break
+        return ok
+
+    def __runPipelined(self, modelProviders, keepSource, **kwargs):
+        mpContext = multiprocess.get_context("fork")
+        downloadQueue = mpContext.Queue()
+
+        def downloadWorker():
+            try:
+                for provider in modelProviders:
+                    ok = self.download(modelProviders=[provider], **kwargs)
+                    downloadQueue.put((provider, ok))
+                    if not ok:
+                        break
+            except Exception as e:
+                logger.exception("Failing with %s", str(e))
+            finally:
+                downloadQueue.put(None)  # Sentinel marking the end of downloads
+
+        ok = False
+        dP = mpContext.Process(target=downloadWorker, name="model-download", daemon=True)
+        dP.start()
+        try:
+            while True:
+                try:
+                    item = downloadQueue.get(timeout=10)
+                except queue.Empty:
+                    if dP.is_alive():
+                        continue
+                    logger.error("Model download process exited unexpectedly (exit code %r)", dP.exitcode)
+                    ok = False
+                    break
+                if item is None:
+                    break
+                provider, ok = item
+                if ok:
+                    # The downloaded data were recorded in the provider cache file by the download process
+                    ok = self.__loadProviderCache(provider) and self.reorganize(modelProviders=[provider], keepSource=keepSource, **kwargs)
+                if not ok:
+                    logger.error("Model provider workflow failed for provider, %s", provider)
+                    break
+        except Exception as e:
+            logger.exception("Failing with %s", str(e))
+            ok = False
+        if not ok and dP.is_alive():
+            logger.info("Cancelling remaining model downloads")
+            dP.terminate()
+        dP.join()
+        return ok
+
+    def __loadProviderCache(self, provider):
+        if provider == "AlphaFold":
+            return self.__aFMP.loadCache()
+        if provider == "ModelArchive":
+            return self.__mAMP.loadCache()
+        return False
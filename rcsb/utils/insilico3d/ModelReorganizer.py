@@ -12,6 +12,15 @@
 #                    Add the PAE access url to the holdings cache file for models with associated PAE data files (currently only AF models)
 #   20-Mar-2023  dwp Assign NCBI ID to ma-ornl-sphdiv files to enable organism metadata population
 #    2-Jan-2024  dwp Modify reorganization method to export models as gzipped BCIF files
+#   17-Oct-2026  dwp Extract cloud archive members in a single pass using in-kernel copies (ModelFileUtil)
+#   17-Oct-2026  dwp Parse input model mmCIF files with the C++ tokenizer (IoAdapterCore) when available
+#   17-Oct-2026  dwp Add optional zstd compression (with optional trained dictionary) for reorganized model files
+#   17-Oct-2026  dwp Request kernel readahead of each worker chunk of input model files before parsing them
+#   17-Oct-2026  dwp Raise the worker chunk size for large lists of individual model files (to about four tasks per process)
+#   17-Oct-2026  dwp Take ownership of the worker result dictionaries instead of deep-copying each one
+#   17-Oct-2026  dwp Hoist per-chunk path prefixes out of the worker loops and skip re-checking known destination directories
+#   17-Oct-2026  dwp Limit the readahead of input model files to a small window ahead of the one being parsed
+#   17-Oct-2026  dwp Check the multiprocessing start method without fixing the global start method as a side effect
 #
 # To Do:
 # - pylint: disable=fixme
@@ -29,17 +38,28 @@ __license__ = "Apache 2.0"
 
 import logging
 import os.path
-import copy
 from datetime import datetime
-import tarfile
+import multiprocess
 import pytz
 
 from mmcif.api.DictionaryApi import DictionaryApi
 from mmcif.api.DataCategory import DataCategory
 from mmcif.io.IoAdapterPy import IoAdapterPy as IoAdapter
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from mmcif.io.IoAdapterCore import IoAdapterCore  # C++ (mmciflib) tokenizer; several times faster than the pure-Python reader
+except ImportError:
+    IoAdapterCore = None
+
 from rcsb.utils.io.MarshalUtil import MarshalUtil
 from rcsb.utils.io.FileUtil import FileUtil
 from rcsb.utils.multiproc.MultiProcUtil import MultiProcUtil
+from rcsb.utils.insilico3d.ModelFileUtil import ModelFileUtil
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
 logger = logging.getLogger(__name__)
@@ -55,6 +75,8 @@ class ModelWorker(object):
         self.__workPath = kwargs.get("workPath", None)
         self.__fU = FileUtil(workPath=self.__workPath)
         self.__mU = MarshalUtil(workPath=self.__workPath)
+        self.__mfU = ModelFileUtil()
+        self.__ioCore = IoAdapterCore(raiseExceptions=True, useCharRefs=True) if IoAdapterCore else None
 
     def reorganize(self, dataList, procName, optionsD, workingDir):
         """Enumerate and reorganize and rename model files, provided a list of individual CIF model file paths as input.
@@ -84,15 +106,28 @@ class ModelWorker(object):
             reorganizeDate = optionsD.get("reorganizeDate", None)  # reorganization date
             sourceArchiveReleaseDate = optionsD.get("sourceArchiveReleaseDate", None)  # externally-obtained release date (i.e., not from CIF); as is case for ModelArchive models
             dictionaryApi = optionsD.get("dictionaryApi", None)
+            inputDataList = optionsD.get("inputDataList", None)  # if provided, dataList holds indices into this list (see ModelReorganizer.__reorganizeModels())
+            zstdCompressor = self.__getZstdCompressor(optionsD)  # None unless zstd compression of output model files is requested
+            internalModelExt = ".bcif.zst" if zstdCompressor else ".bcif.gz"
+            modelSourceDb = modelSourceDbMap[modelSourcePrefix]
+            destPrefixDir = os.path.join(destBaseDir, modelSourcePrefix)
+            destModelDirS = set()  # hashed destination directories already known to exist (saves a stat per model)
             #
-            for modelFileIn in dataList:
+            # Overlap the disk reads of the next few (small) model files with the parsing of the current one, keeping the
+            # readahead a bounded window ahead (rather than requesting the whole chunk at once and crowding the page cache)
+            modelFileInL = [inputDataList[dataItem] for dataItem in dataList] if inputDataList is not None else dataList
+            prefetchWindow = 8
+            self.__mfU.prefetchFiles(modelFileInL[:prefetchWindow])
+            #
+            for ii, (dataItem, modelFileIn) in enumerate(zip(dataList, modelFileInL)):
+                if ii + prefetchWindow < len(modelFileInL):
+                    self.__mfU.prefetchFiles([modelFileInL[ii + prefetchWindow]])
                 modelD = {}
                 success = False
                 modelFileOut = None
                 modelFileNameIn = self.__fU.getFileName(modelFileIn)
-                modelSourceDb = modelSourceDbMap[modelSourcePrefix]
                 #
-                containerList = self.__mU.doImport(modelFileIn, fmt="mmcif")
+                containerList = self.__readModelFile(modelFileIn)
                 if len(containerList) > 1:
                     # Expecting all computed models to have one container per file. When this becomes no longer the case, update this to handle it accordingly.
                     logger.error("Skipping - model file %s has more than one container (%d)", modelFileNameIn, len(containerList))
@@ -144,20 +179,22 @@ class ModelWorker(object):
                     if not ok:
                         logger.warning("Failed to gzip input model file: %s", modelFileIn)
                 #
-                internalModelName = internalModelId + ".bcif.gz"
+                internalModelName = internalModelId + internalModelExt
                 #
                 # Use last six to last two characters for second-level hashed directory
                 firstDir, secondDir = modelEntryId[-6:-4], modelEntryId[-4:-2]
                 modelPathFromPrefixDir = os.path.join(modelSourcePrefix, firstDir, secondDir, internalModelName)
-                destModelDir = os.path.join(destBaseDir, modelSourcePrefix, firstDir, secondDir)
-                if not self.__fU.exists(destModelDir):
-                    try:
-                        self.__fU.mkdir(destModelDir)
-                    except Exception as e:
-                        dirExists = self.__fU.exists(destModelDir)
-                        logger.exception("Failed to create directory %s (exists %r) with exception %r", destModelDir, dirExists, e)
+                destModelDir = os.path.join(destPrefixDir, firstDir, secondDir)
+                if destModelDir not in destModelDirS:
+                    if not self.__fU.exists(destModelDir):
+                        try:
+                            self.__fU.mkdir(destModelDir)
+                        except Exception as e:
+                            dirExists = self.__fU.exists(destModelDir)
+                            logger.exception("Failed to create directory %s (exists %r) with exception %r", destModelDir, dirExists, e)
+                    destModelDirS.add(destModelDir)
                 modelFileOut = os.path.join(destModelDir, internalModelName)
-                modelFileOutUnzip = modelFileOut.split(".gz")[0]
+                modelFileOutUnzip = os.path.splitext(modelFileOut)[0]
                 #
                 sourceModelUrl, sourceModelPaeUrl = self.__getSourceUrl(modelSourcePrefix, modelFileNameIn, sourceModelEntryId)
                 #
@@ -175,14 +212,14 @@ class ModelWorker(object):
                 try:
                     ok = self.__mU.doExport(modelFileOutUnzip, containerList, fmt="bcif", dictionaryApi=dictionaryApi)
                     # logger.debug("export status %r for %s", ok, modelFileOutUnzip)
-                    self.__fU.compress(modelFileOutUnzip, modelFileOut)
+                    self.__compressModelFile(modelFileOutUnzip, modelFileOut, zstdCompressor=zstdCompressor)
                     self.__mU.remove(modelFileOutUnzip)
                     if not keepSource:
                         self.__mU.remove(modelFileInGzip)  # Remove original file
                         if self.__mU.exists(modelFileIn):   # Remove unzipped file too if it exists
                             self.__mU.remove(modelFileIn)
                     success = True
-                    successList.append(modelFileIn)
+                    successList.append(dataItem)
                 except Exception as e:
                     logger.debug("Failing to reorganize %s --> %s, with %s", modelFileIn, modelFileOut, str(e))
                 #
@@ -190,6 +227,7 @@ class ModelWorker(object):
                 #
             failList = sorted(set(dataList) - set(successList))
             if failList:
+                failList = [inputDataList[i] for i in failList] if inputDataList is not None else failList
                 logger.info("%s returns %d definitions with failures: %r", procName, len(failList), failList)
             #
             logger.debug("%s processed %d/%d models, failures %d", procName, len(retList), len(dataList), len(failList))
@@ -226,33 +264,27 @@ class ModelWorker(object):
             reorganizeDate = optionsD.get("reorganizeDate", None)  # reorganization date
             sourceArchiveReleaseDate = optionsD.get("sourceArchiveReleaseDate", None)  # externally-obtained release date (i.e., not from CIF); as is case for ModelArchive models
             dictionaryApi = optionsD.get("dictionaryApi", None)
+            inputDataList = optionsD.get("inputDataList", None)  # if provided, dataList holds indices into this list (see ModelReorganizer.__reorganizeModels())
+            zstdCompressor = self.__getZstdCompressor(optionsD)  # None unless zstd compression of output model files is requested
+            internalModelExt = ".bcif.zst" if zstdCompressor else ".bcif.gz"
+            modelSourceDb = modelSourceDbMap[modelSourcePrefix]
+            destPrefixDir = os.path.join(destBaseDir, modelSourcePrefix)
+            destModelDirS = set()  # hashed destination directories already known to exist (saves a stat per model)
             #
-            for archiveFile in dataList:
+            for dataItem in dataList:
+                archiveFile = inputDataList[dataItem] if inputDataList is not None else dataItem
                 successModelList = []
-                with tarfile.open(archiveFile, "r") as tF:
-                    tfL = tF.getnames()  # Get a list of items (files and directories) in the tar file
-                    logger.debug("tarFile items: %r", tfL)
-                #
-                cifFiles = [file for file in tfL if file.endswith(".cif.gz")]  # only extract model files (not PAE and pLDDT files)
-                logger.info("Working on reorganizing %s (%d models)", archiveFile, len(cifFiles))
-                modelPathL = []
-                for cifFile in cifFiles:
-                    fOutputPath = os.path.join(workingDir, cifFile)
-                    ok = self.__extractTarMember(archiveFile, cifFile, fOutputPath)
-                    modelPathL.append(fOutputPath)
-                    if not ok:
-                        logger.error("Failed to extract member %r from archiveFile %r", cifFile, archiveFile)
-                        ok = False
-                        break
+                # Only extract model files (not PAE and pLDDT files)
+                modelPathL = self.__mfU.extractTarMembers(archiveFile, workingDir, memberSuffix=".cif.gz")
+                logger.info("Working on reorganizing %s (%d models)", archiveFile, len(modelPathL))
                 #
                 for modelPath in modelPathL:
                     modelD = {}
                     success = False
                     modelFileOut = None
                     modelFileNameIn = self.__fU.getFileName(modelPath)
-                    modelSourceDb = modelSourceDbMap[modelSourcePrefix]
                     #
-                    containerList = self.__mU.doImport(modelPath, fmt="mmcif")
+                    containerList = self.__readModelFile(modelPath)
                     if len(containerList) > 1:
                         # Expecting all computed models to have one container per file. When this becomes no longer the case, update this to handle it accordingly.
                         logger.error("Skipping - model file %s has more than one container (%d)", modelFileNameIn, len(containerList))
@@ -300,16 +332,18 @@ class ModelWorker(object):
                         if not ok:
                             logger.warning("Failed to gzip input model file: %s", modelPath)
                     #
-                    internalModelName = internalModelId + ".bcif.gz"
+                    internalModelName = internalModelId + internalModelExt
                     #
                     # Use last six to last two characters for second-level hashed directory
                     firstDir, secondDir = modelEntryId[-6:-4], modelEntryId[-4:-2]
                     modelPathFromPrefixDir = os.path.join(modelSourcePrefix, firstDir, secondDir, internalModelName)
-                    destModelDir = os.path.join(destBaseDir, modelSourcePrefix, firstDir, secondDir)
-                    if not self.__fU.exists(destModelDir):
-                        self.__fU.mkdir(destModelDir)
+                    destModelDir = os.path.join(destPrefixDir, firstDir, secondDir)
+                    if destModelDir not in destModelDirS:
+                        if not self.__fU.exists(destModelDir):
+                            self.__fU.mkdir(destModelDir)
+                        destModelDirS.add(destModelDir)
                     modelFileOut = os.path.join(destModelDir, internalModelName)
-                    modelFileOutUnzip = modelFileOut.split(".gz")[0]
+                    modelFileOutUnzip = os.path.splitext(modelFileOut)[0]
                     #
                     sourceModelUrl, sourceModelPaeUrl = self.__getSourceUrl(modelSourcePrefix, modelFileNameIn, sourceModelEntryId)
                     #
@@ -327,7 +361,7 @@ class ModelWorker(object):
                     try:
                         ok = self.__mU.doExport(modelFileOutUnzip, containerList, fmt="bcif", dictionaryApi=dictionaryApi)
                         logger.debug("export status %r for %s", ok, modelFileOutUnzip)
-                        self.__fU.compress(modelFileOutUnzip, modelFileOut)
+                        self.__compressModelFile(modelFileOutUnzip, modelFileOut, zstdCompressor=zstdCompressor)
                         self.__mU.remove(modelFileOutUnzip)
                         self.__mU.remove(modelFileInGzip)  # Remove original file
                         if self.__mU.exists(modelPath):   # Remove unzipped file too if it exists
@@ -340,10 +374,11 @@ class ModelWorker(object):
                     retList.append((modelPath, modelD, success))
                     #
                 if len(successModelList) > 0 and all(successModelList):
-                    successList.append(archiveFile)
+                    successList.append(dataItem)
             #
             failList = sorted(set(dataList) - set(successList))
             if failList:
+                failList = [inputDataList[i] for i in failList] if inputDataList is not None else failList
                 logger.info("%s returns %d definitions with failures: %r", procName, len(failList), failList)
             #
             logger.debug("%s processed %d/%d models, failures %d", procName, len(retList), len(dataList), len(failList))
@@ -352,15 +387,60 @@ class ModelWorker(object):
 
         return successList, retList, diagList
 
-    def __extractTarMember(self, tarFilePath, memberName, memberPath):
+    def __readModelFile(self, modelFilePath):
+        """Read the data containers of an (optionally gzipped) mmCIF model file.
+
+        Uses the C++ tokenizer (IoAdapterCore) if available, and falls back to the default MarshalUtil (pure-Python) reader otherwise,
+        or if the former fails on a given file.
+
+        Args:
+            modelFilePath (str): path to mmCIF model file
+
+        Returns:
+            list: list of data containers, or None on failure
+        """
+        if self.__ioCore:
+            try:
+                return self.__ioCore.readFile(modelFilePath, enforceAscii=True, outDirPath=self.__workPath)
+            except Exception as e:
+                logger.debug("IoAdapterCore failing to read %s with %s; retrying with default reader", modelFilePath, str(e))
+        return self.__mU.doImport(modelFilePath, fmt="mmcif")
+
+    def __getZstdCompressor(self, optionsD):
+        """Create a zstd compressor from the worker options, if zstd compression of output model files was requested.
+
+        Args:
+            optionsD (dict): worker options, optionally including "modelCompression" ("gzip" or "zstd"), "zstdLevel" (int),
+                             and "zstdDictData" (bytes of a trained zstd dictionary)
+
+        Returns:
+            object: zstandard.ZstdCompressor instance, or None if not requested (or zstandard is not installed)
+        """
+        if optionsD.get("modelCompression", "gzip") != "zstd" or zstandard is None:
+            return None
+        zstdDictData = optionsD.get("zstdDictData", None)
+        zstdDict = zstandard.ZstdCompressionDict(zstdDictData) if zstdDictData else None
+        return zstandard.ZstdCompressor(level=optionsD.get("zstdLevel", 10), dict_data=zstdDict)
+
+    def __compressModelFile(self, inpPath, outPath, zstdCompressor=None):
+        """Compress the input model file with the given zstd compressor, or gzip if none is provided.
+
+        Args:
+            inpPath (str): path of file to compress
+            outPath (str): path of compressed output file
+            zstdCompressor (object, optional): zstandard.ZstdCompressor instance. Defaults to None (use gzip).
+
+        Returns:
+            bool: True for success or False otherwise
+        """
+        if not zstdCompressor:
+            return self.__fU.compress(inpPath, outPath)
         ret = True
         try:
-            with tarfile.open(tarFilePath) as tar:
-                fIn = tar.extractfile(memberName)
-                with open(memberPath, "wb") as ofh:
-                    ofh.write(fIn.read())
+            with open(inpPath, "rb") as fIn, open(outPath, "wb") as fOut:
+                zstdCompressor.copy_stream(fIn, fOut, size=os.fstat(fIn.fileno()).st_size)
         except Exception as e:
-            logger.exception("Failing with %s", str(e))
+            logger.exception("Failing to compress %s with %s", inpPath, str(e))
             ret = False
         return ret
 
@@ -666,6 +746,9 @@ class ModelReorganizer(object):
             workPath (str, optional): directory path for workers to operate in; default is cachePath.
             keepSource (bool, optional): whether to copy model files to new directory instead of moving them; default False.
             dictFilePathL (str, optional): List of dictionary files to use for BCIF encoding.
+            modelCompression (str, optional): compression for reorganized model files, "gzip" (".bcif.gz") or "zstd" (".bcif.zst"; requires zstandard); default "gzip".
+            zstdLevel (int, optional): zstd compression level; default 10.
+            zstdDictPath (str, optional): path to a trained zstd dictionary file to use for zstd compression; default None (no dictionary).
         """
 
         try:
@@ -679,6 +762,17 @@ class ModelReorganizer(object):
             self.__mU = MarshalUtil(workPath=self.__workPath)
             self.__fU = FileUtil(workPath=self.__workPath)
 
+            self.__modelCompression = kwargs.get("modelCompression", "gzip")
+            self.__zstdLevel = kwargs.get("zstdLevel", 10)
+            self.__zstdDictData = None
+            if self.__modelCompression == "zstd" and zstandard is None:
+                logger.warning("zstandard module is not available - falling back to gzip compression for model files")
+                self.__modelCompression = "gzip"
+            zstdDictPath = kwargs.get("zstdDictPath", None)
+            if self.__modelCompression == "zstd" and zstdDictPath:
+                with open(zstdDictPath, "rb") as ifh:
+                    self.__zstdDictData = ifh.read()
+
             self.__cacheFormat = kwargs.get("cacheFormat", "json")
             # self.__cacheFormat = kwargs.get("cacheFormat", "pickle")
             cacheExt = "pic" if self.__cacheFormat == "pickle" else "json"
@@ -755,6 +849,10 @@ class ModelReorganizer(object):
     def getCacheFilePath(self):
         return self.__cacheFilePath
 
+    def getModelHoldings(self):
+        """Return the dictionary of reorganized model holdings (model ID -> model details) currently held by this instance."""
+        return self.__mD
+
     def reorganize(self, inputModelList, modelSource, destBaseDir, useCache=True, inputModelD=None, writeCache=True, **kwargs):
         """Move model files from organism-wide model listing to hashed directory structure and rename files
         to follow internal identifier naming convention.
@@ -789,7 +887,7 @@ class ModelReorganizer(object):
                 for modelId, modelD in mD.items():
                     self.__mD.update({modelId: modelD})
             else:
-                self.__mD = copy.deepcopy(mD)
+                self.__mD = mD  # freshly built by __reorganizeModels(), so there is no other reference to it to copy away from
             #
             ok = len(self.__mD) > 0
             #
@@ -853,10 +951,26 @@ class ModelReorganizer(object):
             "keepSource": self.__keepSource,
             "reorganizeDate": tS,
             "dictionaryApi": self.__dictionaryApi,
+            "modelCompression": self.__modelCompression,
+            "zstdLevel": self.__zstdLevel,
+            "zstdDictData": self.__zstdDictData,
         }
         if sourceArchiveReleaseDate:
             optD.update({"sourceArchiveReleaseDate": sourceArchiveReleaseDate})
         #
+        # When workers are forked, they inherit the options dictionary copy-on-write at start-up, so stash the full input
+        # list there and only pass list indices through the task queue (instead of pickling every file path per task)
+        # (the first of all start methods is the platform default, checked without fixing the global start method)
+        shareInputList = (multiprocess.get_start_method(allow_none=True) or multiprocess.get_all_start_methods()[0]) == "fork"
+        if shareInputList:
+            optD.update({"inputDataList": inputModelList})
+        dataList = list(range(len(inputModelList))) if shareInputList else inputModelList
+        #
+        # Individual model files are cheap to process, so for long input lists hand out larger chunks (about four per process)
+        # to cut down on task queue round trips; archive inputs (AlphaFoldCloud) are left at the requested chunk size
+        if modelSource in ["AlphaFold", "ModelArchive"]:
+            chunkSize = max(chunkSize, len(inputModelList) // (max(numProc, 1) * 4))
+        #
         mpu.setOptions(optD)
         logger.debug("Running multiproc method on inputModelList length %r with numProc %r, chunkSize %r", len(inputModelList), numProc, chunkSize)
         if modelSource in ["AlphaFold", "ModelArchive"]:
@@ -864,17 +978,18 @@ class ModelReorganizer(object):
         elif modelSource in ["AlphaFoldCloud"]:
             mpu.set(workerObj=rWorker, workerMethod="reorganizeCloud")
         mpu.setWorkingDir(workingDir=self.__workPath)
-        ok, failList, resultList, _ = mpu.runMulti(dataList=inputModelList, numProc=numProc, numResults=1, chunkSize=chunkSize)
+        ok, failList, resultList, _ = mpu.runMulti(dataList=dataList, numProc=numProc, numResults=1, chunkSize=chunkSize)
         if failList:
+            failList = [inputModelList[i] for i in failList] if shareInputList else failList
             logger.info("model file failures (%d): %r", len(failList), failList)
         #
+        # The result dictionaries were unpickled from the worker result queue, so they can be used (and modified) as is
         for (modelFileIn, modelD, success) in resultList[0]:
-            modelIdD = copy.deepcopy(modelD)
             if success:
-                modelId = modelIdD.pop("modelId")
-                mD[modelId] = modelIdD
+                modelId = modelD.pop("modelId")
+                mD[modelId] = modelD
             else:
-                failD[modelFileIn] = modelIdD
+                failD[modelFileIn] = modelD
         #
         logger.info("Completed with multi-proc status %r, failures %r, total models with data (%d)", ok, len(failList), len(mD))
         return mD, failD
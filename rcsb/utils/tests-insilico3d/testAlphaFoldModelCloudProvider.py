@@ -19,15 +19,18 @@ __license__ = "Apache 2.0"
 
 import logging
 import os
-import platform
-import resource
 import time
 import unittest
 
+import psutil
+
 from rcsb.utils.insilico3d.AlphaFoldModelCloudProvider import AlphaFoldModelCloudProvider
 
 HERE = os.path.abspath(os.path.dirname(__file__))
 TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+CACHE_PATH = os.path.join(HERE, "test-output", "CACHE", "computed-models")
+DATA_PATH = os.path.join(HERE, "test-data")
+DICT_FILE_PATH = os.path.join(DATA_PATH, "rcsb_mmcif_all.dic")
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
 logger = logging.getLogger()
@@ -36,18 +39,19 @@ logger = logging.getLogger()
 class AlphaFoldModelCloudProviderTests(unittest.TestCase):
 
     def setUp(self):
-        self.__cachePath = os.path.join(HERE, "test-output", "CACHE", "computed-models")
-        self.__dataPath = os.path.join(HERE, "test-data")
-        self.__dictFilePathL = [os.path.join(self.__dataPath, "rcsb_mmcif_all.dic")]
-        self.__startTime = time.time()
-        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+        self.__cachePath = CACHE_PATH
+        self.__dataPath = DATA_PATH
+        self.__dictFilePathL = [DICT_FILE_PATH]
+        self.__startTime = time.monotonic()
+        logger.info("Starting %s", self.id())
 
     def tearDown(self):
-        unitS = "MB" if platform.system() == "Darwin" else "GB"
-        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
-        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10 ** 6, unitS)
-        endTime = time.time()
-        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+        if os.environ.get("INSILICO3D_TEST_MEMORY_REPORT"):
+            # Report unique (anonymous) memory separately from RSS, which also counts shared and file-backed (e.g., mmap'd) pages
+            memInfo = psutil.Process().memory_full_info()
+            logger.info("Resident memory size %.4f GB (unique set size %.4f GB)", memInfo.rss / 10 ** 9, memInfo.uss / 10 ** 9)
+        endTime = time.monotonic()
+        logger.info("Completed %s (%.4f seconds)", self.id(), endTime - self.__startTime)
 
     def testAlphaFoldModelCloudProvider(self):
         redownloadBulkData = True
@@ -55,33 +59,29 @@ class AlphaFoldModelCloudProviderTests(unittest.TestCase):
         # proteome-tax_id-232300-0_v4.tar - corresponds to AF-A0A023GPI8-F1
         #
         # First test fetching model archive
-        if redownloadBulkData:
-            aFMCP = AlphaFoldModelCloudProvider(
-                cachePath=self.__cachePath,
-                useCache=False,
-                numProc=4,
-                chunkSize=20,
-                redownloadBulkData=redownloadBulkData,
-                alphaFoldRequestedTaxIdPrefixList=alphaFoldRequestedTaxIdPrefixList
-            )
-            ok = aFMCP.testCache()
-            self.assertTrue(ok)
-        #
-        # Next test reloading the cache
         aFMCP = AlphaFoldModelCloudProvider(
             cachePath=self.__cachePath,
-            useCache=True,
+            useCache=not redownloadBulkData,
             numProc=4,
             chunkSize=20,
+            redownloadBulkData=redownloadBulkData,
+            alphaFoldRequestedTaxIdPrefixList=alphaFoldRequestedTaxIdPrefixList
         )
+        if redownloadBulkData:
+            ok = aFMCP.testCache()
+            self.assertTrue(ok)
+            #
+            # Next test reloading the cache (reusing the same instance and its storage client)
+            aFMCP.reload(useCache=True, redownloadBulkData=False)
+        #
         taxIdPrefixDirList = aFMCP.getArchiveDirList()
         logger.info("taxIdPrefixDirList: %r", taxIdPrefixDirList)
-        ok = True if len(taxIdPrefixDirList) > 0 else False
+        ok = bool(taxIdPrefixDirList)
         self.assertTrue(ok)
         # #
         archiveFileList = aFMCP.getArchiveFileList(inputPathList=taxIdPrefixDirList)
         logger.info("archiveFileList: %r", archiveFileList)
-        ok = True if len(archiveFileList) > 0 else False
+        ok = bool(archiveFileList)
         self.assertTrue(ok)
         ok = aFMCP.testCache()
         self.assertTrue(ok)
@@ -4,7 +4,7 @@
 # Date:    30-Sep-2021
 #
 # Updates:
-#
+#  17-Oct-2026 dwp Add test of concurrent species fetches where an FTP connection fails
 #
 ##
 """
@@ -19,15 +19,18 @@ __license__ = "Apache 2.0"
 
 import logging
 import os
-import platform
-import resource
+import threading
 import time
 import unittest
+from unittest import mock
+
+import psutil
 
 from rcsb.utils.insilico3d.AlphaFoldModelProvider import AlphaFoldModelProvider
 
 HERE = os.path.abspath(os.path.dirname(__file__))
 TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+CACHE_PATH = os.path.join(HERE, "test-output", "CACHE", "computed-models")
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
 logger = logging.getLogger()
@@ -36,16 +39,17 @@ logger = logging.getLogger()
 class AlphaFoldModelProviderTests(unittest.TestCase):
 
     def setUp(self):
-        self.__cachePath = os.path.join(HERE, "test-output", "CACHE", "computed-models")
-        self.__startTime = time.time()
-        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+        self.__cachePath = CACHE_PATH
+        self.__startTime = time.monotonic()
+        logger.info("Starting %s", self.id())
 
     def tearDown(self):
-        unitS = "MB" if platform.system() == "Darwin" else "GB"
-        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
-        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10 ** 6, unitS)
-        endTime = time.time()
-        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+        if os.environ.get("INSILICO3D_TEST_MEMORY_REPORT"):
+            # Report unique (anonymous) memory separately from RSS, which also counts shared and file-backed (e.g., mmap'd) pages
+            memInfo = psutil.Process().memory_full_info()
+            logger.info("Resident memory size %.4f GB (unique set size %.4f GB)", memInfo.rss / 10 ** 9, memInfo.uss / 10 ** 9)
+        endTime = time.monotonic()
+        logger.info("Completed %s (%.4f seconds)", self.id(), endTime - self.__startTime)
 
     def testAlphaFoldModelProvider(self):
         redownloadBulkData = True
@@ -71,11 +75,11 @@ class AlphaFoldModelProviderTests(unittest.TestCase):
             alphaFoldRequestedSpeciesList=["Helicobacter pylori"]
         )
         speciesDirList = aFMP.getArchiveDirList()
-        ok = True if len(speciesDirList) > 0 else False
+        ok = bool(speciesDirList)
         self.assertTrue(ok)
         #
         speciesModelFileList = aFMP.getModelFileList(inputPathList=speciesDirList)
-        ok = True if len(speciesModelFileList) > 0 else False
+        ok = bool(speciesModelFileList)
         self.assertTrue(ok)
         ok = aFMP.testCache()
         self.assertTrue(ok)
@@ -95,10 +99,41 @@ class AlphaFoldModelProviderTests(unittest.TestCase):
         ok = aFMR.testCache()
         self.assertTrue(ok)  # Confirm that testCache SUCCEEDED (>= 20 in cache)
 
+    def testFetchSpeciesArchivesConnectFailure(self):
+        """Test that a species whose FTP connection is refused is skipped without losing the other species in the batch."""
+        lock = threading.Lock()
+        connectCountL = []
+
+        class FailingFtpUtil:
+            def __init__(self, **kwargs):
+                pass
+
+            def connect(self, hostName, **kwargs):
+                with lock:
+                    connectCountL.append(hostName)
+                    if len(connectCountL) == 2:
+                        raise OSError("421 Too many connections")
+                return True
+
+            def close(self):
+                return True
+
+        def fetchSpeciesArchive(archiveD, cacheD, ftpU=None):
+            cacheD["data"].update({archiveD["species"]: {"archive_name": archiveD["archive_name"]}})
+            return cacheD
+
+        aFMP = AlphaFoldModelProvider(cachePath=self.__cachePath, reload=False, numFetchThreads=2)
+        archiveDataList = [{"species": "Species %d" % ii, "archive_name": "archive_%d.tar" % ii} for ii in range(4)]
+        with mock.patch("rcsb.utils.insilico3d.AlphaFoldModelProvider.FtpUtil", FailingFtpUtil), mock.patch.object(aFMP, "fetchSpeciesArchive", side_effect=fetchSpeciesArchive):
+            cacheD = aFMP._AlphaFoldModelProvider__fetchSpeciesArchives(archiveDataList, {"data": {}})  # pylint: disable=no-member
+        self.assertEqual(len(connectCountL), 4)
+        self.assertEqual(len(cacheD["data"]), 3)
+
 
 def fetchAlphaFoldModels():
     suiteSelect = unittest.TestSuite()
     suiteSelect.addTest(AlphaFoldModelProviderTests("testAlphaFoldModelProvider"))
+    suiteSelect.addTest(AlphaFoldModelProviderTests("testFetchSpeciesArchivesConnectFailure"))
     return suiteSelect
 
 
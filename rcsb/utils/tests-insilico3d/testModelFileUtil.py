@@ -0,0 +1,251 @@
+##
+# File:    testModelFileUtil.py
+# Author:  Dennis Piehl
+# Date:    17-Oct-2026
+#
+# Updates:
+#
+#
+##
+"""
+Tests for low-level file and archive handling utilities (copying, extraction, listing, and fingerprinting of model files).
+
+"""
+
+__docformat__ = "google en"
+__author__ = "Dennis Piehl"
+__email__ = "dennis.piehl@rcsb.org"
+__license__ = "Apache 2.0"
+
+import gzip
+import io
+import logging
+import os
+import shutil
+import tarfile
+import threading
+import time
+import unittest
+import zipfile
+from unittest import mock
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from rcsb.utils.insilico3d.ModelFileUtil import ModelFileUtil
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+WORK_PATH = os.path.join(HERE, "test-output", "ModelFileUtil")
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logger = logging.getLogger()
+
+
+class ModelFileUtilTests(unittest.TestCase):
+
+    def setUp(self):
+        self.__workPath = WORK_PATH
+        shutil.rmtree(self.__workPath, ignore_errors=True)
+        self.__srcPath = os.path.join(self.__workPath, "src")
+        self.__outPath = os.path.join(self.__workPath, "out")
+        os.makedirs(self.__srcPath)
+        os.makedirs(self.__outPath)
+        # Archive members: two models (in a sub-directory), a PDB-format copy, and macOS metadata files
+        self.__memberD = {
+            "models/AF-P00001-F1-model_v4.cif.gz": gzip.compress(b"data_AF-P00001-F1\n" * 1000),
+            "models/AF-P00002-F1-model_v4.cif.gz": gzip.compress(b"data_AF-P00002-F1\n" * 3000),
+            "models/AF-P00001-F1-model_v4.pdb.gz": gzip.compress(b"ATOM\n" * 100),
+            "models/._AF-P00001-F1-model_v4.cif.gz": b"AppleDouble",
+            "__MACOSX/models/AF-P00003-F1-model_v4.cif.gz": b"AppleDouble",
+        }
+        self.__startTime = time.monotonic()
+        logger.info("Starting %s", self.id())
+
+    def tearDown(self):
+        shutil.rmtree(self.__workPath, ignore_errors=True)
+        endTime = time.monotonic()
+        logger.info("Completed %s (%.4f seconds)", self.id(), endTime - self.__startTime)
+
+    def __writeTarFile(self, fileName, mode):
+        tarFilePath = os.path.join(self.__srcPath, fileName)
+        with tarfile.open(tarFilePath, mode) as tF:
+            for name, data in self.__memberD.items():
+                tI = tarfile.TarInfo(name)
+                tI.size = len(data)
+                tF.addfile(tI, io.BytesIO(data))
+        return tarFilePath
+
+    def __checkExtractedModels(self, pathL):
+        expectedD = {os.path.basename(name): data for name, data in self.__memberD.items() if name.startswith("models/AF-") and name.endswith(".cif.gz")}
+        self.assertEqual(sorted(os.path.basename(pth) for pth in pathL), sorted(expectedD))
+        for pth in pathL:
+            self.assertEqual(os.path.dirname(pth), self.__outPath)
+            with open(pth, "rb") as ifh:
+                self.assertEqual(ifh.read(), expectedD[os.path.basename(pth)])
+        self.assertEqual(sorted(os.listdir(self.__outPath)), sorted(expectedD))  # no ".part" or metadata files left behind
+
+    def testCopyFileRange(self):
+        mfU = ModelFileUtil(bufferSize=4096)
+        data = os.urandom(100000)
+        inpPath = os.path.join(self.__srcPath, "input.bin")
+        with open(inpPath, "wb") as ofh:
+            ofh.write(data)
+        # Exercise the in-kernel copy, the sendfile fallback, and the userspace fallback in turn
+        patchL = [
+            [],
+            [mock.patch.object(os, "copy_file_range", side_effect=OSError("unsupported"), create=True)],
+            [
+                mock.patch.object(os, "copy_file_range", side_effect=OSError("unsupported"), create=True),
+                mock.patch.object(os, "sendfile", side_effect=OSError("unsupported"), create=True),
+            ],
+        ]
+        for ii, patches in enumerate(patchL):
+            outPath = os.path.join(self.__outPath, "output-%d.bin" % ii)
+            for patcher in patches:
+                patcher.start()
+            try:
+                with open(inpPath, "rb") as ifh, open(outPath, "wb") as ofh:
+                    ofh.write(b"HEADER")
+                    ofh.flush()
+                    nB = mfU.copyFileRange(ifh.fileno(), ofh.fileno(), 50000, offsetIn=1234)
+            finally:
+                for patcher in patches:
+                    patcher.stop()
+            self.assertEqual(nB, 50000)
+            with open(outPath, "rb") as ifh:
+                self.assertEqual(ifh.read(), b"HEADER" + data[1234:51234])
+
+    def testExtractTarMembers(self):
+        mfU = ModelFileUtil()
+        for fileName, mode in [("models.tar", "w"), ("models.tar.gz", "w:gz")]:
+            tarFilePath = self.__writeTarFile(fileName, mode)
+            pathL = mfU.extractTarMembers(tarFilePath, self.__outPath, memberSuffix=".cif.gz")
+            self.__checkExtractedModels(pathL)
+            shutil.rmtree(self.__outPath)
+            os.makedirs(self.__outPath)
+
+    def testExtractTarStream(self):
+        mfU = ModelFileUtil()
+        with open(self.__writeTarFile("models.tar", "w"), "rb") as ifh:
+            tarData = ifh.read()
+        # Feed the archive, plus trailing data, through a pipe; the writer must not be left blocked once extraction ends
+        rFd, wFd = os.pipe()
+
+        def writer():
+            with os.fdopen(wFd, "wb") as ofh:
+                ofh.write(tarData + b"\0" * 1048576)
+
+        wT = threading.Thread(target=writer, daemon=True)
+        wT.start()
+        with os.fdopen(rFd, "rb") as ifh:
+            pathL = mfU.extractTarStream(ifh, self.__outPath, memberSuffix=".cif.gz")
+        wT.join(30)
+        self.assertFalse(wT.is_alive())
+        self.__checkExtractedModels(pathL)
+
+    def testExtractTarStreamTruncated(self):
+        mfU = ModelFileUtil()
+        with open(self.__writeTarFile("models.tar.gz", "w:gz"), "rb") as ifh:
+            tarData = ifh.read()
+        # A stream cut off part way through leaves no partial (or ".part") file under any name
+        pathL = mfU.extractTarStream(io.BytesIO(tarData[: len(tarData) // 2]), self.__outPath, memberSuffix=".cif.gz")
+        outNameL = os.listdir(self.__outPath)
+        self.assertEqual(sorted(outNameL), sorted(os.path.basename(pth) for pth in pathL))
+        self.assertFalse([name for name in outNameL if name.endswith(".part")])
+        for pth in pathL:
+            with open(pth, "rb") as ifh:
+                self.assertEqual(ifh.read(), self.__memberD["models/" + os.path.basename(pth)])
+
+    def testExtractZipMembers(self):
+        mfU = ModelFileUtil()
+        zipFilePath = os.path.join(self.__srcPath, "models.zip")
+        with zipfile.ZipFile(zipFilePath, "w") as zF:
+            for name, data in self.__memberD.items():
+                zF.writestr(name, data)
+            zF.writestr("models/ma-bak-cepc-0001.a3m", b">query\n")
+            zF.writestr("models/", b"")
+        pathL = mfU.extractZipMembers(zipFilePath, self.__outPath, excludeSuffixList=[".a3m", ".pdb.gz"])
+        self.__checkExtractedModels(pathL)
+
+    def testListDirFiles(self):
+        mfU = ModelFileUtil()
+        for name in ["a.cif.gz", "b.cif", "c.pdb", ".hidden.cif.gz"]:
+            with open(os.path.join(self.__srcPath, name), "wb") as ofh:
+                ofh.write(b"x")
+        os.makedirs(os.path.join(self.__srcPath, "subdir.cif.gz"))
+        oldNs = time.time_ns() - 10 * 10 ** 9
+        os.utime(self.__srcPath, ns=(oldNs, oldNs))
+        pathL = mfU.listDirFiles(self.__srcPath, nameSuffix=(".cif", ".cif.gz"))
+        self.assertEqual(sorted(os.path.basename(pth) for pth in pathL), ["a.cif.gz", "b.cif"])
+        #
+        # The listing is memoized while the directory modification time is unchanged...
+        with open(os.path.join(self.__srcPath, "d.cif"), "wb") as ofh:
+            ofh.write(b"x")
+        os.utime(self.__srcPath, ns=(oldNs, oldNs))
+        pathL = mfU.listDirFiles(self.__srcPath, nameSuffix=(".cif", ".cif.gz"))
+        self.assertEqual(len(pathL), 2)
+        # ...and redone once it changes
+        os.remove(os.path.join(self.__srcPath, "a.cif.gz"))
+        pathL = mfU.listDirFiles(self.__srcPath, nameSuffix=(".cif", ".cif.gz"))
+        self.assertEqual(sorted(os.path.basename(pth) for pth in pathL), ["b.cif", "d.cif"])
+
+    def testGetDirFingerprint(self):
+        mfU = ModelFileUtil()
+        filePath = os.path.join(self.__srcPath, "a.cif.gz")
+        with open(filePath, "wb") as ofh:
+            ofh.write(b"x")
+        fp1 = mfU.getDirFingerprint(self.__srcPath, nameSuffix=".cif.gz")
+        self.assertEqual(fp1, mfU.getDirFingerprint(self.__srcPath, nameSuffix=".cif.gz"))
+        # Hidden and non-matching files are ignored
+        for name in [".a.cif.gz", "a.pdb"]:
+            with open(os.path.join(self.__srcPath, name), "wb") as ofh:
+                ofh.write(b"x")
+        self.assertEqual(fp1, mfU.getDirFingerprint(self.__srcPath, nameSuffix=".cif.gz"))
+        # A different salt, or a changed file, changes the fingerprint
+        self.assertNotEqual(fp1, mfU.getDirFingerprint(self.__srcPath, nameSuffix=".cif.gz", salt="computed-models"))
+        os.utime(filePath, ns=(1, 1))
+        self.assertNotEqual(fp1, mfU.getDirFingerprint(self.__srcPath, nameSuffix=".cif.gz"))
+
+    def testPrefetchFiles(self):
+        mfU = ModelFileUtil()
+        filePathL = []
+        for name in ["a.cif.gz", "b.cif.gz"]:
+            filePathL.append(os.path.join(self.__srcPath, name))
+            with open(filePathL[-1], "wb") as ofh:
+                ofh.write(b"x")
+        numAdvised = mfU.prefetchFiles(filePathL + [os.path.join(self.__srcPath, "missing.cif.gz")])
+        self.assertEqual(numAdvised, 2 if hasattr(os, "posix_fadvise") else 0)
+
+    def testGetFdLimitedWorkerCount(self):
+        mfU = ModelFileUtil()
+        self.assertGreaterEqual(mfU.getFdLimitedWorkerCount(4, fdsPerWorker=6), 1)
+        if resource is None:
+            self.skipTest("resource module not available")
+        with mock.patch.object(resource, "getrlimit", return_value=(256, 4096)):
+            self.assertEqual(mfU.getFdLimitedWorkerCount(100, fdsPerWorker=6), (256 - 64) // 6)
+            self.assertEqual(mfU.getFdLimitedWorkerCount(8, fdsPerWorker=6), 8)
+            self.assertEqual(mfU.getFdLimitedWorkerCount(100, fdsPerWorker=1000), 1)
+        with mock.patch.object(resource, "getrlimit", return_value=(resource.RLIM_INFINITY, resource.RLIM_INFINITY)):
+            self.assertEqual(mfU.getFdLimitedWorkerCount(100, fdsPerWorker=6), 100)
+
+
+def suiteModelFileUtil():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(ModelFileUtilTests("testCopyFileRange"))
+    suiteSelect.addTest(ModelFileUtilTests("testExtractTarMembers"))
+    suiteSelect.addTest(ModelFileUtilTests("testExtractTarStream"))
+    suiteSelect.addTest(ModelFileUtilTests("testExtractTarStreamTruncated"))
+    suiteSelect.addTest(ModelFileUtilTests("testExtractZipMembers"))
+    suiteSelect.addTest(ModelFileUtilTests("testListDirFiles"))
+    suiteSelect.addTest(ModelFileUtilTests("testGetDirFingerprint"))
+    suiteSelect.addTest(ModelFileUtilTests("testPrefetchFiles"))
+    suiteSelect.addTest(ModelFileUtilTests("testGetFdLimitedWorkerCount"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = suiteModelFileUtil()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)
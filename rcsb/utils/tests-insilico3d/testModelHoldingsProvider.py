@@ -19,45 +19,53 @@ __license__ = "Apache 2.0"
 
 import logging
 import os
-import platform
-import resource
 import time
 import unittest
 
+import psutil
+
 from rcsb.utils.config.ConfigUtil import ConfigUtil
 from rcsb.utils.insilico3d.ModelHoldingsProvider import ModelHoldingsProvider
 
 HERE = os.path.abspath(os.path.dirname(__file__))
 TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+CACHE_PATH = os.path.join(HERE, "test-output", "CACHE")
+DATA_PATH = os.path.join(HERE, "test-data")
+MOCK_TOP_PATH = os.path.join(TOPDIR, "rcsb", "mock-data")
+CONFIG_PATH = os.path.join(MOCK_TOP_PATH, "config", "dbload-setup-example.yml")
 
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
 logger = logging.getLogger()
 
 
 class ModelHoldingsProviderTests(unittest.TestCase):
-    def setUp(self):
-        self.__cachePath = os.path.join(HERE, "test-output", "CACHE")
-        self.__dataPath = os.path.join(HERE, "test-data")
-        self.__mockTopPath = os.path.join(TOPDIR, "rcsb", "mock-data")
-        self.__configPath = os.path.join(self.__mockTopPath, "config", "dbload-setup-example.yml")
+    @classmethod
+    def setUpClass(cls):
+        # Parse the configuration once for all tests in the class
+        cls.__cachePath = CACHE_PATH
+        cls.__dataPath = DATA_PATH
+        cls.__mockTopPath = MOCK_TOP_PATH
+        cls.__configPath = CONFIG_PATH
         configName = "site_info_configuration"
-        self.__configName = configName
-        self.__cfgOb = ConfigUtil(configPath=self.__configPath, defaultSectionName=configName, mockTopPath=self.__mockTopPath)
-        #
-        self.__csmRemoteDirPath = self.__cfgOb.getPath("PDBX_COMP_MODEL_REPO_PATH", sectionName=self.__configName, default=None)
-        self.__holdingsListRemotePath = self.__cfgOb.getPath("PDBX_COMP_MODEL_HOLDINGS_LIST_PATH", sectionName=self.__configName, default=None)
-        if self.__holdingsListRemotePath is None:
-            self.__holdingsListRemotePath = os.path.join(self.__dataPath, "computed-models-holdings-list.json")
+        cls.__configName = configName
+        cls.__cfgOb = ConfigUtil(configPath=cls.__configPath, defaultSectionName=configName, mockTopPath=cls.__mockTopPath)
         #
-        self.__startTime = time.time()
-        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+        cls.__csmRemoteDirPath = cls.__cfgOb.getPath("PDBX_COMP_MODEL_REPO_PATH", sectionName=cls.__configName, default=None)
+        cls.__holdingsListRemotePath = cls.__cfgOb.getPath("PDBX_COMP_MODEL_HOLDINGS_LIST_PATH", sectionName=cls.__configName, default=None)
+        if cls.__holdingsListRemotePath is None:
+            cls.__holdingsListRemotePath = os.path.join(cls.__dataPath, "computed-models-holdings-list.json")
+
+    def setUp(self):
+        self.__startTime = time.monotonic()
+        logger.info("Starting %s", self.id())
 
     def tearDown(self):
-        unitS = "MB" if platform.system() == "Darwin" else "GB"
-        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
-        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10 ** 6, unitS)
-        endTime = time.time()
-        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+        if os.environ.get("INSILICO3D_TEST_MEMORY_REPORT"):
+            # Report unique (anonymous) memory separately from RSS, which also counts shared and file-backed (e.g., mmap'd) pages
+            memInfo = psutil.Process().memory_full_info()
+            logger.info("Resident memory size %.4f GB (unique set size %.4f GB)", memInfo.rss / 10 ** 9, memInfo.uss / 10 ** 9)
+        endTime = time.monotonic()
+        logger.info("Completed %s (%.4f seconds)", self.id(), endTime - self.__startTime)
 
     def testGetModelHoldings(self):
         mcP = ModelHoldingsProvider(cachePath=self.__cachePath, useCache=False, csmRemoteDirPath=self.__csmRemoteDirPath, holdingsListRemotePath=self.__holdingsListRemotePath)
@@ -19,15 +19,16 @@ __license__ = "Apache 2.0"
 
 import logging
 import os
-import platform
-import resource
 import time
 import unittest
 
+import psutil
+
 from rcsb.utils.insilico3d.ModelProviderWorkflow import ModelProviderWorkflow
 
 HERE = os.path.abspath(os.path.dirname(__file__))
 TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+CACHE_PATH = os.path.join(HERE, "test-output", "CACHE", "computed-models")
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
 logger = logging.getLogger()
@@ -37,16 +38,17 @@ class ModelProviderWorkflowTests(unittest.TestCase):
     runTestWorkflow = False
 
     def setUp(self):
-        self.__cachePath = os.path.join(HERE, "test-output", "CACHE", "computed-models")
-        self.__startTime = time.time()
-        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+        self.__cachePath = CACHE_PATH
+        self.__startTime = time.monotonic()
+        logger.info("Starting %s", self.id())
 
     def tearDown(self):
-        unitS = "MB" if platform.system() == "Darwin" else "GB"
-        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
-        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10 ** 6, unitS)
-        endTime = time.time()
-        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+        if os.environ.get("INSILICO3D_TEST_MEMORY_REPORT"):
+            # Report unique (anonymous) memory separately from RSS, which also counts shared and file-backed (e.g., mmap'd) pages
+            memInfo = psutil.Process().memory_full_info()
+            logger.info("Resident memory size %.4f GB (unique set size %.4f GB)", memInfo.rss / 10 ** 9, memInfo.uss / 10 ** 9)
+        endTime = time.monotonic()
+        logger.info("Completed %s (%.4f seconds)", self.id(), endTime - self.__startTime)
 
     @unittest.skipUnless(runTestWorkflow, "Skip running the workflow")
     def testModelProviderWorkflow(self):
@@ -59,9 +61,7 @@ class ModelProviderWorkflowTests(unittest.TestCase):
             chunkSize=40,
             alphaFoldRequestedSpeciesList=["Helicobacter pylori"],
         )
-        ok = mPWf.download()
-        self.assertTrue(ok)
-        ok = mPWf.reorganize(keepSource=True)
+        ok = mPWf.run(keepSource=True)
         self.assertTrue(ok)
 
 